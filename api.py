@@ -0,0 +1,372 @@
+import json
+from datetime import date, datetime, timezone
+
+from flask import (
+    Blueprint,
+    Response,
+    abort,
+    current_app,
+    jsonify,
+    request,
+    stream_with_context,
+)
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+import partitions
+import booking
+import recurrence
+from deletion import delete_entities
+from models import Artist, Genre, Venue, artist_genres, venue_genres
+from pagination import (
+    decode_cursor,
+    encode_cursor,
+    keyset_filter,
+    nulls_largest,
+    page_size,
+)
+from views import forget_booked, forget_deleted, record_exists
+
+api = Blueprint("api", __name__, url_prefix="/api/v1")
+
+
+# ----------------------------------------------------------------------------#
+# Resources: selectable fields and keyset order of each listing.
+# ----------------------------------------------------------------------------#
+
+VENUE_FIELDS = {
+    name: getattr(Venue, name)
+    for name in (
+        "id",
+        "name",
+        "address",
+        "city",
+        "state",
+        "phone",
+        "website",
+        "facebook_link",
+        "image_link",
+        "seeking_talent",
+        "seeking_description",
+        "upcoming_shows_count",
+        "past_shows_count",
+    )
+}
+ARTIST_FIELDS = {
+    name: getattr(Artist, name)
+    for name in (
+        "id",
+        "name",
+        "city",
+        "state",
+        "phone",
+        "website",
+        "facebook_link",
+        "image_link",
+        "seeking_venue",
+        "seeking_description",
+        "upcoming_shows_count",
+        "past_shows_count",
+    )
+}
+
+
+def show_fields(shows):
+    # shows is Show or the partitions.show_source() it is queried through.
+    return {
+        "id": shows.id,
+        "start_time": shows.start_time,
+        "end_time": shows.end_time,
+        "venue_id": shows.venue_id,
+        "venue_name": Venue.name,
+        "artist_id": shows.artist_id,
+        "artist_name": Artist.name,
+        "artist_image_link": Artist.image_link,
+    }
+
+
+def serialize(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def selected_fields(available, extra=()):
+    # ?fields=id,name limits the output; default is every field.
+    fields = request.args.get("fields")
+    if not fields:
+        return list(available) + list(extra)
+    fields = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in available and f not in extra]
+    if unknown:
+        abort(400, description=f"unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def paginate(query, order_columns, order_types):
+    # apply ?cursor= and ?limit=, returning (rows, next_cursor).
+    limit = page_size(
+        request.args.get("limit", type=int),
+        current_app.config["API_PAGE_SIZE"],
+        current_app.config["MAX_PAGE_SIZE"],
+    )
+    cursor = request.args.get("cursor")
+    if cursor:
+        try:
+            after = decode_cursor(cursor, *order_types)
+        except ValueError:
+            abort(400, description="invalid cursor")
+        query = query.filter(
+            keyset_filter(order_columns, after, nulls_largest=nulls_largest(query))
+        )
+    rows = query.order_by(*order_columns).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(*(last[f"_key{i}"] for i in range(len(order_columns))))
+
+
+def listing(query, available, order_columns, order_types, extra=()):
+    fields = selected_fields(available, extra)
+    columns = [available[f].label(f) for f in fields if f in available]
+    keys = [c.label(f"_key{i}") for i, c in enumerate(order_columns)]
+    rows, next_cursor = paginate(
+        query.with_entities(*columns, *keys), order_columns, order_types
+    )
+    data = [{f: serialize(row[f]) for f in fields if f in available} for row in rows]
+    return fields, rows, data, next_cursor
+
+
+def attach_genres(data, rows, link, fk):
+    # one query for the genres of every entity on the page.
+    ids = [row._key0 for row in rows]
+    genres = {}
+    for entity_id, name in (
+        db.session.query(fk, Genre.name)
+        .join(Genre, Genre.id == link.c.genre_id)
+        .filter(fk.in_(ids))
+        .order_by(fk, Genre.name)
+    ):
+        genres.setdefault(entity_id, []).append(name)
+    for item, entity_id in zip(data, ids):
+        item["genres"] = genres.get(entity_id, [])
+
+
+# ----------------------------------------------------------------------------#
+# Endpoints.
+# ----------------------------------------------------------------------------#
+
+
+@api.route("/venues")
+def venues():
+    fields, rows, data, next_cursor = listing(
+        db.session.query(Venue), VENUE_FIELDS, (Venue.id,), (int,), extra=("genres",)
+    )
+    if "genres" in fields:
+        attach_genres(data, rows, venue_genres, venue_genres.c.venue_id)
+    return jsonify({"data": data, "next_cursor": next_cursor})
+
+
+@api.route("/artists")
+def artists():
+    fields, rows, data, next_cursor = listing(
+        db.session.query(Artist),
+        ARTIST_FIELDS,
+        (Artist.id,),
+        (int,),
+        extra=("genres",),
+    )
+    if "genres" in fields:
+        attach_genres(data, rows, artist_genres, artist_genres.c.artist_id)
+    return jsonify({"data": data, "next_cursor": next_cursor})
+
+
+@api.route("/shows")
+def shows():
+    # every show, archived ones included.
+    shows = partitions.show_source()
+    query = (
+        db.session.query(shows)
+        .join(Artist, Artist.id == shows.artist_id)
+        .join(Venue, Venue.id == shows.venue_id)
+    )
+    fields, rows, data, next_cursor = listing(
+        query, show_fields(shows), (shows.start_time, shows.id), (datetime, int)
+    )
+    return jsonify({"data": data, "next_cursor": next_cursor})
+
+
+def parse_time(value, dates=False):
+    # ISO 8601; with dates, a bare date is kept as a date. Times with an
+    # offset are converted to UTC, naive ones are taken as UTC already.
+    if not isinstance(value, str):
+        raise ValueError(f"expected an ISO 8601 time, got {value!r}")
+    if dates and len(value) == 10:
+        return date.fromisoformat(value)
+    value = datetime.fromisoformat(value)
+    return value.astimezone(timezone.utc) if value.tzinfo else value
+
+
+@api.route("/shows", methods=["POST"])
+def create_shows():
+    # {"venue_id": 1, "artist_id": 2, "start_time": "...", "end_time": "...",
+    # "repeat": {"frequency": "weekly" | "monthly", "count": 52} or
+    # {..., "until": "..."}} books every occurrence in one transaction, or
+    # none of them. end_time is optional.
+    body = request.get_json(silent=True) or {}
+    venue_id, artist_id = body.get("venue_id"), body.get("artist_id")
+    repeat = body.get("repeat") or {}
+    if not isinstance(repeat, dict):
+        abort(400, description="repeat must be an object")
+    try:
+        start_time = parse_time(body.get("start_time"))
+        end_time = body.get("end_time")
+        length = booking.show_length(start_time, end_time and parse_time(end_time))
+        count, until = repeat.get("count"), repeat.get("until")
+        if count is not None and not isinstance(count, int):
+            raise ValueError("count must be an integer")
+        start_times = recurrence.expand(
+            start_time,
+            repeat.get("frequency"),
+            count,
+            until and parse_time(until, dates=True),
+            current_app.config["MAX_OCCURRENCES"],
+        )
+    except ValueError as e:
+        abort(400, description=str(e))
+    if not (
+        isinstance(venue_id, int)
+        and record_exists(Venue, venue_id)
+        and isinstance(artist_id, int)
+        and record_exists(Artist, artist_id)
+    ):
+        abort(400, description="venue_id and artist_id must name existing records")
+
+    shows = booking.bookings(venue_id, artist_id, start_times, length)
+    conflicts = booking.find_conflicts(shows)
+    if conflicts:
+        return booking_conflict(
+            [
+                {
+                    "start_time": serialize(show["start_time"]),
+                    "show_id": clash["id"],
+                    "show_start_time": serialize(clash["start_time"]),
+                    "show_end_time": serialize(clash["end_time"]),
+                }
+                for show, clash in conflicts
+            ]
+        )
+    try:
+        created = booking.book_shows(shows)
+        db.session.commit()
+    except IntegrityError as e:
+        # Postgres' exclusion constraints caught an overlap booked meanwhile
+        # by a writer that skipped booking.find_conflicts();
+        # anything else is the venue or artist deleted meanwhile.
+        db.session.rollback()
+        if booking.overlap_violation(e):
+            return booking_conflict([])
+        abort(400, description="venue_id and artist_id must name existing records")
+    forget_booked(venue_id, artist_id)
+    return (
+        jsonify(
+            {
+                "created": created,
+                "shows": [
+                    {
+                        "start_time": serialize(show["start_time"]),
+                        "end_time": serialize(show["end_time"]),
+                    }
+                    for show in shows
+                ],
+            }
+        ),
+        201,
+    )
+
+
+def booking_conflict(conflicts):
+    return (
+        jsonify(
+            {
+                "error": "the venue or the artist is already booked then",
+                "conflicts": conflicts,
+            }
+        ),
+        409,
+    )
+
+
+def bulk_delete(model):
+    # {"ids": [...]} -> every listed entity, its shows and genre links go in
+    # one transaction of set-based statements.
+    ids = (request.get_json(silent=True) or {}).get("ids")
+    if not isinstance(ids, list) or not all(
+        isinstance(i, int) and not isinstance(i, bool) for i in ids
+    ):
+        abort(400, description='expected {"ids": [<int>, ...]}')
+    deleted, counterpart_ids = delete_entities(model, ids)
+    db.session.commit()
+    forget_deleted(model, deleted, counterpart_ids)
+    return jsonify({"deleted": deleted, "not_found": sorted(set(ids) - set(deleted))})
+
+
+@api.route("/venues", methods=["DELETE"])
+def delete_venues():
+    return bulk_delete(Venue)
+
+
+@api.route("/artists", methods=["DELETE"])
+def delete_artists():
+    return bulk_delete(Artist)
+
+
+@api.record
+def unversioned_bulk_deletes(state):
+    # the bulk deletes also answer at /api/venues and /api/artists, outside
+    # the /api/v1 prefix, where they were first asked for.
+    for view in (delete_venues, delete_artists):
+        state.app.add_url_rule(
+            "/api/" + view.__name__.split("_")[1],
+            f"{state.name}.{view.__name__}",
+            view,
+            methods=["DELETE"],
+        )
+
+
+@api.route("/export/shows.ndjson")
+def export_shows():
+    # one JSON object per line, streamed from a server side cursor so memory
+    # stays flat however many shows there are.
+    shows = partitions.show_source()
+    query = (
+        db.session.query(
+            shows.id, shows.start_time, shows.end_time, shows.venue_id, shows.artist_id
+        )
+        .order_by(shows.id)
+        .execution_options(stream_results=True)
+        .yield_per(current_app.config["EXPORT_BATCH_SIZE"])
+    )
+
+    def generate():
+        for row in query:
+            yield json.dumps(
+                {
+                    "id": row.id,
+                    "start_time": serialize(row.start_time),
+                    "end_time": serialize(row.end_time),
+                    "venue_id": row.venue_id,
+                    "artist_id": row.artist_id,
+                }
+            ) + "\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="application/x-ndjson",
+        headers={"Content-Disposition": "attachment; filename=shows.ndjson"},
+    )
+
+
+@api.errorhandler(400)
+@api.errorhandler(404)
+def api_error(error):
+    return jsonify({"error": error.description}), error.code
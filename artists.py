@@ -0,0 +1,311 @@
+import sys
+
+from flask import (
+    Blueprint,
+    abort,
+    current_app,
+    flash,
+    jsonify,
+    redirect,
+    render_template,
+    request,
+    url_for,
+)
+
+import partitions
+import search
+from conditional import conditional
+from deletion import delete_entities
+from extensions import cache, db, names
+from forms import ArtistForm
+from models import Artist, Genre, Venue, artist_genres, utcnow
+from pagination import keyset_page
+from routing import replica_ok
+from views import (
+    availability,
+    detail_validator,
+    extract_data,
+    forget_deleted,
+    listing_limit,
+    load_detail,
+    match_list,
+    remember_profile,
+)
+
+artists = Blueprint("artists", __name__, url_prefix="/artists")
+
+ARTIST_FIELDS = (
+    "id",
+    "name",
+    "city",
+    "state",
+    "phone",
+    "website",
+    "facebook_link",
+    "seeking_venue",
+    "seeking_description",
+    "image_link",
+)
+
+
+# hot query, checked against its index by indexes.py.
+def artist_listing_query(genre=None, letter=None):
+    # artists by name; letter skips ahead to the first name at or after it.
+    query = db.session.query(Artist.id, Artist.name)
+    if genre:
+        query = (
+            query.join(artist_genres, artist_genres.c.artist_id == Artist.id)
+            .join(Genre, Genre.id == artist_genres.c.genre_id)
+            .filter(Genre.name == genre)
+        )
+    if letter:
+        query = query.filter(Artist.name >= letter)
+    return query.order_by(Artist.name, Artist.id)
+
+
+# the /artists jump-to links.
+LETTERS = [chr(c) for c in range(ord("A"), ord("Z") + 1)]
+
+
+def artist_validator(artist_id):
+    return detail_validator(Artist, artist_id, "artist_id", "venue_id", Venue)
+
+
+# cache invalidation: an artist's name and image also appear on the pages of
+# its shows' venues and on /shows.
+def invalidate_artist(artist_id):
+    shows = partitions.show_source()
+    venue_ids = (
+        db.session.query(shows.venue_id).filter(shows.artist_id == artist_id).distinct()
+    )
+    cache.invalidate(
+        "artists",
+        "shows",
+        f"artist:{artist_id}",
+        *(f"venue:{venue_id}" for venue_id, in venue_ids),
+    )
+
+
+#  Artists
+#  ----------------------------------------------------------------
+
+
+@artists.route("")
+@cache.cached("artists")
+def index():
+    genre = request.args.get("genre")
+    letter = request.args.get("letter", "").strip().upper()[:1] or None
+    try:
+        rows, next_cursor = keyset_page(
+            artist_listing_query(genre, letter),
+            (Artist.name, Artist.id),
+            request.args.get("cursor"),
+            (str, int),
+            listing_limit(),
+        )
+    except ValueError:
+        abort(400)
+
+    data = [{"id": artist.id, "name": artist.name} for artist in rows]
+    return render_template(
+        "pages/artists.html",
+        artists=data,
+        genre=genre,
+        letter=letter,
+        letters=LETTERS,
+        next_cursor=next_cursor,
+        next_url=next_cursor
+        and url_for(
+            "artists.index",
+            cursor=next_cursor,
+            genre=genre,
+            letter=letter,
+            limit=request.args.get("limit"),
+        ),
+    )
+
+
+@artists.route("/search", methods=["POST"])
+@replica_ok
+def search_artists():
+    search_term = extract_data("search_term")
+    page = max(request.form.get("page", 1, type=int), 1)
+    limit = current_app.config["SEARCH_PAGE_SIZE"]
+    total, artist_result = search.search_artists(
+        search_term, limit, offset=(page - 1) * limit
+    )
+
+    response = {
+        "count": total,
+        "data": [
+            {
+                "id": result.id,
+                "name": result.name,
+                "num_upcoming_shows": result.num_upcoming_shows,
+            }
+            for result in artist_result
+        ],
+    }
+    return render_template(
+        "pages/search_artists.html",
+        results=response,
+        search_term=request.form.get("search_term", ""),
+        page=page,
+        has_next=page * limit < total,
+    )
+
+
+@artists.route("/<int:artist_id>")
+@conditional(artist_validator)
+@cache.cached("artist:{artist_id}")
+def show_artist(artist_id):
+    artist = Artist.query.get_or_404(artist_id)
+    past = request.args.get("past", type=int) == 1
+    data = load_detail(
+        artist, ARTIST_FIELDS, "artist_id", "venue_id", Venue, "venue", past
+    )
+    return render_template(
+        "pages/show_artist.html",
+        artist=data,
+        past=past,
+        past_url=url_for("artists.show_artist", artist_id=artist_id, past=1),
+    )
+
+
+@artists.route("/<int:artist_id>/availability")
+def artist_availability(artist_id):
+    return availability("artist", Artist, artist_id)
+
+
+@artists.route("/<int:artist_id>/matches")
+def artist_matches(artist_id):
+    return match_list("artist", Artist, artist_id)
+
+
+@artists.route("/<int:artist_id>", methods=["DELETE"])
+def delete_artist(artist_id):
+    status = False
+    try:
+        deleted, venue_ids = delete_entities(Artist, [artist_id])
+        if not deleted:
+            raise LookupError(f"no artist {artist_id}")
+        db.session.commit()
+        forget_deleted(Artist, deleted, venue_ids)
+        status = True
+        flash("Artist successfully deleted!")
+
+    except:
+        print(sys.exc_info())
+        db.session.rollback()
+        status = False
+        flash("Error deleting artist", category="error")
+
+    finally:
+        db.session.close()
+
+    return jsonify({"success": status})
+
+
+#  Update
+#  ----------------------------------------------------------------
+
+
+@artists.route("/<int:artist_id>/edit", methods=["GET"])
+def edit_artist(artist_id):
+    form = ArtistForm()
+    data = Artist.query.get(artist_id)
+    edit_artist_data = {
+        "id": data.id,
+        "name": data.name,
+        "genres": [genre.name for genre in data.genres],
+        "city": data.city,
+        "state": data.state,
+        "phone": data.phone,
+        "website_link": data.website,
+        "facebook_link": data.facebook_link,
+        "seeking_venue": data.seeking_venue,
+        "seeking_description": data.seeking_description,
+        "image_link": data.image_link,
+    }
+    return render_template("forms/edit_artist.html", form=form, artist=edit_artist_data)
+
+
+@artists.route("/<int:artist_id>/edit", methods=["POST"])
+def edit_artist_submission(artist_id):
+    try:
+        data = Artist.query.get(artist_id)
+        data.name = request.form.get("name")
+        data.genres = Genre.resolve(request.form.getlist("genres"))
+        data.city = request.form.get("city")
+        data.state = request.form.get("state")
+        data.phone = request.form.get("phone")
+        data.facebook_link = request.form.get("facebook_link")
+        data.image_link = request.form.get("image_link")
+        data.website = request.form.get("website_link")
+        data.seeking_venue = (
+            True if request.form.get("seeking_venue") != None else False
+        )
+        data.seeking_description = request.form.get("seeking_description")
+        # genre changes don't touch the row itself, so bump it explicitly.
+        data.updated_at = utcnow()
+        db.session.add(data)
+        db.session.commit()
+        invalidate_artist(artist_id)
+        names.add("artists", artist_id, request.form.get("name"))
+        remember_profile("artists", artist_id, "seeking_venue")
+    except:
+        db.session.rollback()
+    finally:
+        db.session.close()
+    return redirect(url_for("artists.show_artist", artist_id=artist_id))
+
+
+#  Create Artist
+#  ----------------------------------------------------------------
+
+
+@artists.route("/create", methods=["GET"])
+def create_artist_form():
+    form = ArtistForm()
+    return render_template("forms/new_artist.html", form=form)
+
+
+@artists.route("/create", methods=["POST"])
+def create_artist_submission():
+    error = False
+    try:
+        data = Artist()
+        data.name = request.form.get("name")
+        data.genres = Genre.resolve(request.form.getlist("genres"))
+        data.city = request.form.get("city")
+        data.state = request.form.get("state")
+        data.phone = request.form.get("phone")
+        data.facebook_link = request.form.get("facebook_link")
+        data.image_link = request.form.get("image_link")
+        data.website = request.form.get("website_link")
+        data.seeking_venue = (
+            True if request.form.get("seeking_venue") != None else False
+        )
+        data.seeking_description = request.form.get("seeking_description")
+        db.session.add(data)
+        db.session.commit()
+        cache.invalidate("artists")
+        names.add("artists", data.id, data.name)
+        remember_profile("artists", data.id, "seeking_venue")
+    except:
+        error = True
+        db.session.rollback()
+        print(sys.exc_info())
+    finally:
+        db.session.close()
+    if not error:
+        flash("Artist " + request.form.get("name") + " was successfully listed!")
+    else:
+        flash(
+            "An error occurred. Artist "
+            + request.form.get("name")
+            + " could not be listed."
+        )
+        # Internal Server Error
+        abort(500)
+    return render_template("pages/home.html")
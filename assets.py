@@ -0,0 +1,131 @@
+import hashlib
+import json
+import mimetypes
+import os
+
+from flask import current_app, request, send_from_directory
+
+from compression import brotli, compress, negotiate
+
+# ----------------------------------------------------------------------------#
+# Static assets.
+#
+# `flask fyyur build-static` copies every file under the static folder to
+# STATIC_BUILD_DIR with a content hash in its name (css/main.css ->
+# build/css/main.3f2a1b9c0d4e.css), writes .br (when brotli is installed) and
+# .gz siblings for text assets, and records the mapping in manifest.json.
+# Once built, url_for("static", filename="css/main.css") points at the
+# fingerprinted copy, which is served precompressed and cached for
+# STATIC_MAX_AGE. Unbuilt files are served as before.
+# ----------------------------------------------------------------------------#
+
+MANIFEST = "manifest.json"
+# formats that are already compressed (images, woff fonts) are left alone.
+PRECOMPRESS = {".css", ".js", ".map", ".svg", ".json", ".txt", ".html", ".ttf", ".eot"}
+SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+def fingerprinted(path, data):
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def build(static_folder, build_dir, level=9):
+    # returns the manifest: {"files": {path: built path}, "encodings":
+    # {built path: [encoding, ...]}}, paths relative to the static folder
+    # and build_dir. Earlier builds are kept so pages cached by clients
+    # still find their assets.
+    out = os.path.join(static_folder, build_dir)
+    manifest = {"files": {}, "encodings": {}}
+    for root, dirs, files in os.walk(static_folder):
+        if os.path.abspath(root) == os.path.abspath(static_folder):
+            dirs[:] = [d for d in dirs if d != build_dir]
+        for name in sorted(files):
+            source = os.path.join(root, name)
+            path = os.path.relpath(source, static_folder).replace(os.sep, "/")
+            with open(source, "rb") as f:
+                data = f.read()
+            built = fingerprinted(path, data)
+            write(os.path.join(out, built), data)
+            manifest["files"][path] = built
+
+            if os.path.splitext(name)[1].lower() not in PRECOMPRESS:
+                continue
+            encodings = []
+            for encoding in ("br", "gzip"):
+                if encoding == "br" and brotli is None:
+                    continue
+                encoded = compress(data, encoding, level)
+                if len(encoded) < len(data):
+                    write(os.path.join(out, built + SUFFIXES[encoding]), encoded)
+                    encodings.append(encoding)
+            if encodings:
+                manifest["encodings"][built] = encodings
+
+    os.makedirs(out, exist_ok=True)
+    with open(os.path.join(out, MANIFEST + ".tmp"), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(os.path.join(out, MANIFEST + ".tmp"), os.path.join(out, MANIFEST))
+    return manifest
+
+
+def load_manifest(app):
+    path = os.path.join(app.static_folder, app.config["STATIC_BUILD_DIR"], MANIFEST)
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"files": {}, "encodings": {}}
+
+
+# ----------------------------------------------------------------------------#
+# Serving.
+# ----------------------------------------------------------------------------#
+
+
+def static_url_defaults(endpoint, values):
+    # url_for("static", filename=...) -> the fingerprinted copy, if built.
+    if endpoint != "static" or "filename" not in values:
+        return
+    built = current_app.extensions["assets"]["files"].get(values["filename"])
+    if built is not None:
+        values["filename"] = f"{current_app.config['STATIC_BUILD_DIR']}/{built}"
+
+
+def serve_built(filename, fallback):
+    build_dir = current_app.config["STATIC_BUILD_DIR"]
+    if not filename.startswith(build_dir + "/"):
+        return fallback(filename=filename)
+    built = filename[len(build_dir) + 1 :]
+    available = current_app.extensions["assets"]["encodings"].get(built, [])
+    encoding = available and negotiate(request.accept_encodings, available)
+
+    # fingerprinted names never change content: cache them for good.
+    response = send_from_directory(
+        current_app.static_folder,
+        filename + (SUFFIXES[encoding] if encoding else ""),
+        mimetype=mimetypes.guess_type(filename)[0],
+        max_age=current_app.config["STATIC_MAX_AGE"],
+    )
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    if available:
+        response.vary.add("Accept-Encoding")
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def init_app(app):
+    app.config.setdefault("STATIC_BUILD_DIR", "build")
+    app.config.setdefault("STATIC_MAX_AGE", 365 * 24 * 3600)
+    app.extensions["assets"] = load_manifest(app)
+    app.url_defaults(static_url_defaults)
+    fallback = app.view_functions["static"]
+    app.view_functions["static"] = lambda filename: serve_built(filename, fallback)
@@ -0,0 +1,355 @@
+"""Per-route benchmark: latency and SQL statement counts against a baseline.
+
+    python bench.py --shows 100000 --save      # record bench_baseline.json
+    python bench.py --shows 100000             # compare, exit 1 on regression
+    python bench.py --queries-only             # compare statement counts only
+
+Runs against --database-url, seeding it with seed.py when it is empty, or
+against a fresh SQLite file seeded for this run, so that the bookings and
+edits of earlier runs don't skew the comparison. The response cache is
+disabled so every request exercises the database. Startup (importing app.py,
+create_app() and the first request) is timed in fresh interpreters, as a
+worker would start. Pages whose template is missing from templates/ render
+as the template's name, as in tests/conftest.py, so the benchmark measures
+the views and their queries on any checkout.
+
+Statement counts are the same on every machine, so `fab test` checks them
+against the committed bench_baseline.json; latencies are only comparable
+with a baseline recorded on the same machine.
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "bench_baseline.json")
+
+
+def template_fallback(app):
+    # templates/ first; a missing template renders as its own name.
+    from jinja2 import ChoiceLoader, FunctionLoader
+
+    app.jinja_loader = ChoiceLoader(
+        [app.jinja_loader, FunctionLoader(lambda name: name)]
+    )
+
+
+def build_app(database_url):
+    from app import create_app
+    from cache import NullCache
+    from config import TestingConfig
+    from extensions import db
+
+    app = create_app(TestingConfig(database_url))
+    app.config["ENFORCE_QUERY_BUDGETS"] = False
+    template_fallback(app)
+    app.extensions["response_cache"].backend = NullCache()
+    return app, db
+
+
+def routes(db):
+    # (name, method, path, body) for every route of the blueprints; body is
+    # None, {"data": form} or {"json": document}, or a function of the round
+    # returning one.
+    from datetime import timedelta
+
+    from sqlalchemy import func
+
+    from models import Artist, Show, Venue
+
+    venue_id, other_venue_id = (
+        id for id, in db.session.query(Venue.id).order_by(Venue.id).limit(2)
+    )
+    artist_id, other_artist_id = (
+        id for id, in db.session.query(Artist.id).order_by(Artist.id).limit(2)
+    )
+    # bookings go after every existing show, at a new time each round so they
+    # don't clash with the previous round's.
+    latest = db.session.query(func.max(Show.end_time)).scalar() + timedelta(days=1)
+
+    def booking(offset, **extra):
+        return lambda i: {
+            "data": {
+                "venue_id": str(venue_id),
+                "artist_id": str(artist_id),
+                "start_time": (latest + offset * (i + 1)).strftime("%Y-%m-%d %H:%M:%S"),
+                **extra,
+            }
+        }
+
+    def api_booking(offset):
+        # another venue and artist, so they never clash with the form's.
+        return lambda i: {
+            "json": {
+                "venue_id": other_venue_id,
+                "artist_id": other_artist_id,
+                "start_time": (latest + offset * (i + 1)).isoformat(),
+            }
+        }
+
+    venue_form = {
+        "name": "Bench Venue",
+        "city": "San Francisco",
+        "state": "CA",
+        "address": "1 Main St",
+        "phone": "415-555-0100",
+        "genres": ["Jazz", "Blues"],
+        "facebook_link": "https://www.facebook.com/bench",
+    }
+    artist_form = {**venue_form, "name": "Bench Artist"}
+    del artist_form["address"]
+    return [
+        ("index", "GET", "/", None),
+        ("healthz", "GET", "/healthz", None),
+        ("venues", "GET", "/venues", None),
+        ("venues_by_genre", "GET", "/venues?genre=Jazz", None),
+        ("search_venues", "POST", "/venues/search", {"data": {"search_term": "blue"}}),
+        ("show_venue", "GET", f"/venues/{venue_id}", None),
+        ("show_venue_past", "GET", f"/venues/{venue_id}?past=1", None),
+        ("create_venue_form", "GET", "/venues/create", None),
+        ("create_venue_submission", "POST", "/venues/create", {"data": venue_form}),
+        ("edit_venue", "GET", f"/venues/{venue_id}/edit", None),
+        (
+            "edit_venue_submission",
+            "POST",
+            f"/venues/{venue_id}/edit",
+            {"data": venue_form},
+        ),
+        ("artists", "GET", "/artists", None),
+        ("artists_by_genre", "GET", "/artists?genre=Jazz", None),
+        (
+            "search_artists",
+            "POST",
+            "/artists/search",
+            {"data": {"search_term": "silver"}},
+        ),
+        ("show_artist", "GET", f"/artists/{artist_id}", None),
+        ("show_artist_past", "GET", f"/artists/{artist_id}?past=1", None),
+        ("create_artist_form", "GET", "/artists/create", None),
+        ("create_artist_submission", "POST", "/artists/create", {"data": artist_form}),
+        ("edit_artist", "GET", f"/artists/{artist_id}/edit", None),
+        (
+            "edit_artist_submission",
+            "POST",
+            f"/artists/{artist_id}/edit",
+            {"data": artist_form},
+        ),
+        ("shows", "GET", "/shows", None),
+        ("shows_past", "GET", "/shows?past=1", None),
+        ("create_shows", "GET", "/shows/create", None),
+        (
+            "create_show_submission",
+            "POST",
+            "/shows/create",
+            booking(timedelta(days=1)),
+        ),
+        (
+            "create_show_residency",
+            "POST",
+            "/shows/create",
+            booking(timedelta(weeks=53), repeat="weekly", count="52"),
+        ),
+        ("venue_availability", "GET", f"/venues/{venue_id}/availability", None),
+        ("artist_availability", "GET", f"/artists/{artist_id}/availability", None),
+        ("venue_matches", "GET", f"/venues/{venue_id}/matches", None),
+        ("artist_matches", "GET", f"/artists/{artist_id}/matches", None),
+        ("typeahead_venues", "GET", "/api/typeahead/venues?q=the", None),
+        ("typeahead_artists", "GET", "/api/typeahead/artists?q=sil", None),
+        ("api_venues", "GET", "/api/v1/venues?fields=id,name,genres", None),
+        ("api_artists", "GET", "/api/v1/artists", None),
+        ("api_shows", "GET", "/api/v1/shows", None),
+        ("api_create_show", "POST", "/api/v1/shows", api_booking(timedelta(days=1))),
+        ("api_export_shows", "GET", "/api/v1/export/shows.ndjson", None),
+    ]
+
+
+_queries = re.compile(r'desc="(\d+) queries"')
+
+
+def measure(client, method, path, body, rounds):
+    timings, queries, status = [], 0, None
+    for i in range(rounds + 1):
+        started = time.perf_counter()
+        response = client.open(
+            path, method=method, **((body(i) if callable(body) else body) or {})
+        )
+        # streamed responses are only produced while the body is read.
+        response.get_data()
+        elapsed = (time.perf_counter() - started) * 1000
+        status = response.status_code
+        # streamed responses query while the body is read, uncounted and
+        # without a count in Server-Timing (see instrumentation.py); theirs
+        # is None, and not compared.
+        match = _queries.search(response.headers.get("Server-Timing", ""))
+        queries = int(match.group(1)) if match else None
+        # the first round warms up connections and template caches.
+        if i:
+            timings.append(elapsed)
+    timings.sort()
+    return {
+        "status": status,
+        "median_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[int(0.95 * (len(timings) - 1))], 3),
+        "queries": queries,
+    }
+
+
+# run in a fresh interpreter per round; prints the phase timings as JSON.
+STARTUP_PROBE = """
+import json, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+application = app.create_app()
+created = time.perf_counter()
+import bench
+bench.template_fallback(application)
+requested = time.perf_counter()
+response = application.test_client().get("/venues")
+finished = time.perf_counter()
+print(json.dumps({
+    "import": (imported - started) * 1000,
+    "create_app": (created - imported) * 1000,
+    "first_request": (finished - requested) * 1000,
+    "status": response.status_code,
+    "server_timing": response.headers.get("Server-Timing", ""),
+}))
+"""
+
+
+def measure_startup(rounds, database_url):
+    # {"startup_<phase>": result} with the same fields as measure(); the
+    # probes build the testing profile on database_url.
+    env = {**os.environ, "FYYUR_CONFIG": "testing", "TEST_DATABASE_URL": database_url}
+    runs = []
+    for _ in range(rounds):
+        output = subprocess.run(
+            [sys.executable, "-c", STARTUP_PROBE],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env=env,
+            stdout=subprocess.PIPE,
+            text=True,
+            check=True,
+        ).stdout
+        runs.append(json.loads(output.splitlines()[-1]))
+    results = {}
+    for phase in ("import", "create_app", "first_request"):
+        timings = sorted(run[phase] for run in runs)
+        results[f"startup_{phase}"] = {
+            "status": None,
+            "median_ms": round(statistics.median(timings), 3),
+            "p95_ms": round(timings[int(0.95 * (len(timings) - 1))], 3),
+            "queries": 0,
+        }
+    match = _queries.search(runs[-1]["server_timing"])
+    results["startup_first_request"].update(
+        status=runs[-1]["status"], queries=int(match.group(1)) if match else 0
+    )
+    return results
+
+
+def report(name, r):
+    queries = "-" if r["queries"] is None else r["queries"]
+    print(
+        f"{name:28} {r['status'] or '-':3}  median {r['median_ms']:8.2f} ms  "
+        f"p95 {r['p95_ms']:8.2f} ms  {queries:>3} queries"
+    )
+
+
+def compare(results, baseline, tolerance, min_delta_ms, timings=True):
+    failures = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if None not in (result["queries"], before["queries"]) and (
+            result["queries"] > before["queries"]
+        ):
+            failures.append(
+                f"{name}: {result['queries']} queries, baseline {before['queries']}"
+            )
+        if not timings:
+            continue
+        slower = result["median_ms"] - before["median_ms"]
+        if slower > min_delta_ms and slower > before["median_ms"] * tolerance:
+            failures.append(
+                f"{name}: median {result['median_ms']:.2f} ms, "
+                f"baseline {before['median_ms']:.2f} ms"
+            )
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url")
+    parser.add_argument("--shows", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument(
+        "--startup-rounds", type=int, default=5, help="0 skips the startup timing."
+    )
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="Overwrite the baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--min-delta-ms", type=float, default=1.0)
+    parser.add_argument(
+        "--queries-only",
+        action="store_true",
+        help="Compare statement counts only, not latencies.",
+    )
+    args = parser.parse_args(argv)
+
+    scratch = tempfile.TemporaryDirectory(prefix="fyyur_bench_")
+    database_url = args.database_url or "sqlite:///" + os.path.join(
+        scratch.name, "bench.db"
+    )
+    app, db = build_app(database_url)
+    with app.app_context():
+        db.create_all()
+        from models import Show
+        from seed import seed
+
+        if db.session.query(Show.id).first() is None:
+            print(f"seeding {args.shows} shows into {database_url} ...")
+            seed(args.shows)
+        plan = routes(db)
+
+    client = app.test_client()
+    results = {}
+    for name, method, path, body in plan:
+        results[name] = measure(client, method, path, body, args.rounds)
+        report(name, results[name])
+    if args.startup_rounds:
+        startup = measure_startup(args.startup_rounds, database_url)
+        for name, result in startup.items():
+            report(name, result)
+        results.update(startup)
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; run with --save to record one")
+        return 1
+    with open(args.baseline) as f:
+        failures = compare(
+            results,
+            json.load(f),
+            args.tolerance,
+            args.min_delta_ms,
+            timings=not args.queries_only,
+        )
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+from sqlalchemy import insert, or_, text
+
+from extensions import db
+import counters
+import partitions
+from models import Show, as_utc
+
+# ----------------------------------------------------------------------------#
+# Booking and double-booking checks.
+#
+# A show runs from start_time to end_time (SHOW_DEFAULT_MINUTES when no end
+# is given) and lasts at most SHOW_MAX_MINUTES. That bound turns "overlaps
+# [start, end)" into a range on start_time, start_time in
+# (start - SHOW_MAX_MINUTES, end), which ix_Show_venue_id_start_time and
+# ix_Show_artist_id_start_time answer.
+#
+# These checks are what keeps bookings apart. On Postgres find_conflicts()
+# first takes transaction-level advisory locks on the venues and artists
+# involved, so two bookings of the same venue or artist run their check and
+# insert one after the other. The exclusion constraints (see
+# models.show_exclusion_ddl) live on each monthly partition and only catch
+# overlapping shows that start in the same month; two shows overlapping
+# across a month boundary are caught by these checks alone.
+# ----------------------------------------------------------------------------#
+
+
+def default_length():
+    return timedelta(minutes=current_app.config["SHOW_DEFAULT_MINUTES"])
+
+
+def max_length():
+    return timedelta(minutes=current_app.config["SHOW_MAX_MINUTES"])
+
+
+def show_length(start_time, end_time=None):
+    # how long a show starting at start_time and ending at end_time (or the
+    # default length) runs; raises ValueError when that is impossible.
+    if end_time is None:
+        return default_length()
+    length = as_utc(end_time) - as_utc(start_time)
+    if length <= timedelta(0):
+        raise ValueError("a show has to end after it starts")
+    if length > max_length():
+        raise ValueError(f"a show can last at most {max_length()}")
+    return length
+
+
+def bookings(venue_id, artist_id, start_times, length):
+    # Show rows for every start time.
+    return [
+        {
+            "venue_id": venue_id,
+            "artist_id": artist_id,
+            "start_time": when,
+            "end_time": when + length,
+        }
+        for when in start_times
+    ]
+
+
+def overlapping(source, first, last):
+    # shows that may overlap [first, last): a range scan on start_time.
+    return source.start_time > first - max_length(), source.start_time < last
+
+
+# advisory lock namespaces (the first key of pg_advisory_xact_lock).
+VENUE_LOCK, ARTIST_LOCK = 1, 2
+
+
+def lock_bookings(shows):
+    # on Postgres, lock the venues and artists of `shows` until the
+    # transaction ends; in a stable order, so two bookings never deadlock.
+    if db.engine.dialect.name != "postgresql":
+        return
+    keys = sorted(
+        {(VENUE_LOCK, show["venue_id"]) for show in shows}
+        | {(ARTIST_LOCK, show["artist_id"]) for show in shows}
+    )
+    db.session.execute(
+        text("SELECT pg_advisory_xact_lock(k, i) FROM unnest(:kinds, :ids) AS t(k, i)"),
+        {"kinds": [k for k, _ in keys], "ids": [i for _, i in keys]},
+    )
+
+
+def find_conflicts(shows):
+    # [(show, clash)] for every show (dicts as from bookings()) overlapping an
+    # existing show, or an earlier one of `shows`, at the same venue or by the
+    # same artist. clash has id (None for one of `shows`), start_time and
+    # end_time. One query, whatever the number of shows (plus the locks on
+    # Postgres, held until the caller commits book_shows() or rolls back).
+    if not shows:
+        return []
+    lock_bookings(shows)
+    first = min(as_utc(show["start_time"]) for show in shows)
+    last = max(as_utc(show["end_time"]) for show in shows)
+    source = partitions.show_source(past=first <= datetime.now(timezone.utc))
+    existing = (
+        db.session.query(
+            source.id,
+            source.start_time,
+            source.end_time,
+            source.venue_id,
+            source.artist_id,
+        )
+        .filter(
+            or_(
+                source.venue_id.in_({show["venue_id"] for show in shows}),
+                source.artist_id.in_({show["artist_id"] for show in shows}),
+            ),
+            *overlapping(source, first, last),
+        )
+        .all()
+    )
+
+    # (start, end, id) per venue and per artist, sorted by start.
+    timelines = {}
+    for row in existing:
+        entry = (as_utc(row.start_time), as_utc(row.end_time), row.id)
+        for key in (("venue", row.venue_id), ("artist", row.artist_id)):
+            insort(timelines.setdefault(key, []), entry)
+
+    conflicts = []
+    for show in shows:
+        start, end = as_utc(show["start_time"]), as_utc(show["end_time"])
+        keys = (("venue", show["venue_id"]), ("artist", show["artist_id"]))
+        clash = None
+        for key in keys:
+            timeline = timelines.get(key, [])
+            # entries starting before `end`, latest first; none starting
+            # before start - max length can still be running.
+            i = bisect_left(timeline, (end,)) - 1
+            while clash is None and i >= 0 and timeline[i][0] > start - max_length():
+                if timeline[i][1] > start:
+                    clash = timeline[i]
+                i -= 1
+        if clash is not None:
+            conflicts.append(
+                (show, {"id": clash[2], "start_time": clash[0], "end_time": clash[1]})
+            )
+            continue
+        for key in keys:
+            insort(timelines.setdefault(key, []), (start, end, None))
+    return conflicts
+
+
+# SQLSTATE of an exclusion constraint violation.
+EXCLUSION_VIOLATION = "23P01"
+
+
+def overlap_violation(error):
+    # whether an IntegrityError from book_shows() comes from the exclusion
+    # constraints (a show booked meanwhile by a writer that skipped
+    # find_conflicts()) rather than from, say, a foreign key to a venue or
+    # artist deleted meanwhile.
+    code = getattr(error.orig, "pgcode", None) or getattr(error.orig, "sqlstate", None)
+    return code == EXCLUSION_VIOLATION
+
+
+def book_shows(shows):
+    # one INSERT for every show, counters included; the caller checks
+    # find_conflicts(), commits, and invalidates the cache.
+    if not shows:
+        return 0
+    db.session.execute(insert(Show.__table__), shows)
+    counters.shows_added(
+        [(show["venue_id"], show["artist_id"], show["start_time"]) for show in shows]
+    )
+    return len(shows)
+
+
+def schedule_query(source, fk, entity_id, start, end):
+    # the venue's or artist's shows that may overlap [start, end), by start.
+    return (
+        db.session.query(source.id, source.start_time, source.end_time)
+        .filter(getattr(source, fk) == entity_id, *overlapping(source, start, end))
+        .order_by(source.start_time)
+    )
+
+
+def availability(fk, entity_id, start, end):
+    # (busy, free) within [start, end) for the venue or artist: busy is the
+    # (start, end, show id) of each show, free the gaps between them. One
+    # index range scan.
+    start, end = as_utc(start), as_utc(end)
+    source = partitions.show_source(past=start <= datetime.now(timezone.utc))
+    rows = schedule_query(source, fk, entity_id, start, end).all()
+    busy, free, cursor = [], [], start
+    for row in rows:
+        show_start, show_end = as_utc(row.start_time), as_utc(row.end_time)
+        if show_end <= start:
+            continue
+        busy.append((show_start, show_end, row.id))
+        if show_start > cursor:
+            free.append((cursor, show_start))
+        cursor = max(cursor, show_end)
+    if cursor < end:
+        free.append((cursor, end))
+    return busy, free
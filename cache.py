@@ -0,0 +1,201 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, current_app, g, make_response, request, session
+
+
+# ----------------------------------------------------------------------------#
+# Backends.
+# ----------------------------------------------------------------------------#
+
+
+class CacheBackend:
+    # interface for shared backends (redis, memcached, ...); values are
+    # picklable tuples, ttl is in seconds and None means no expiry.
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class NullCache(CacheBackend):
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+
+class LRUCache(CacheBackend):
+    # in-process, thread safe, bounded LRU with per-entry expiry.
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires is not None and expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+BACKENDS = {"lru": LRUCache, "null": NullCache}
+
+
+# ----------------------------------------------------------------------------#
+# Response cache.
+#
+# Pages are cached under a tag such as "venues" or "venue:3" plus the full
+# request path. Each tag has a version token stored in the backend;
+# invalidating a tag replaces its token, so every variant of the page
+# (query strings, cursors) is dropped at once and the stale entries age out.
+# A missing token is regenerated, so an evicted token can only cause misses.
+#
+# Tokens carry the time they were issued. A page whose tag changed within
+# REPLICA_READ_YOUR_WRITES_SECONDS (the replica lag we allow for) is rendered
+# from the primary before it is cached: the replica may not have the write
+# yet, and the stale page would be served to everyone until it expires.
+# ----------------------------------------------------------------------------#
+
+
+def new_version():
+    return f"{time.time():.3f}:{uuid.uuid4().hex}"
+
+
+def version_age(version):
+    # seconds since the version was issued; older tokens carry no time.
+    issued, _, _ = version.partition(":")
+    try:
+        return time.time() - float(issued)
+    except ValueError:
+        return float("inf")
+
+
+class PageCache:
+    # one app's backend and tag versions.
+    def __init__(self, backend, ttl=None):
+        self.backend = backend
+        self.ttl = ttl
+
+    def _version(self, tag):
+        key = f"version:{tag}"
+        version = self.backend.get(key)
+        if version is None:
+            version = new_version()
+            self.backend.set(key, version)
+        return version
+
+    def invalidate(self, *tags):
+        for tag in tags:
+            self.backend.set(f"version:{tag}", new_version())
+
+    def clear(self):
+        self.backend.clear()
+
+
+class ResponseCache:
+    # the extension; each app gets its own PageCache, so apps built by
+    # create_app() never share pages. A backend passed here is shared by all
+    # of them, otherwise CACHE_BACKEND picks one per app.
+    def __init__(self, app=None, backend=None):
+        self.backend = backend
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend = self.backend
+        if backend is None:
+            backend = app.config.get("CACHE_BACKEND", "lru")
+        if isinstance(backend, str):
+            backend = BACKENDS[backend]()
+            if isinstance(backend, LRUCache):
+                backend.max_entries = app.config.get("CACHE_MAX_ENTRIES", 1024)
+        app.extensions["response_cache"] = PageCache(
+            backend, app.config.get("CACHE_DEFAULT_TTL", 60)
+        )
+
+    @property
+    def pages(self):
+        return current_app.extensions["response_cache"]
+
+    def invalidate(self, *tags):
+        self.pages.invalidate(*tags)
+
+    def clear(self):
+        self.pages.clear()
+
+    def cached(self, tag_template):
+        # cache a GET view under tag_template formatted with the view kwargs,
+        # e.g. @cache.cached("venue:{venue_id}").
+        def decorator(view):
+            @wraps(view)
+            def wrapper(**kwargs):
+                # pages carrying flashed messages are per-user; never share them.
+                if request.method != "GET" or session.get("_flashes"):
+                    return view(**kwargs)
+
+                pages = self.pages
+                tag = tag_template.format(**kwargs)
+                version = pages._version(tag)
+                key = f"page:{tag}:{version}:{request.full_path}"
+                # a client that just wrote re-renders (and refreshes) the page.
+                hit = None if g.get("db_read_your_writes") else pages.backend.get(key)
+                if hit is not None:
+                    body, status, mimetype = hit
+                    return Response(body, status=status, mimetype=mimetype)
+
+                lag = current_app.config.get("REPLICA_READ_YOUR_WRITES_SECONDS", 5)
+                if g.get("db_replica") and version_age(version) < lag:
+                    g.db_replica = False
+
+                response = make_response(view(**kwargs))
+                if response.status_code == 200 and not response.is_streamed:
+                    pages.backend.set(
+                        key,
+                        (response.get_data(), response.status_code, response.mimetype),
+                        pages.ttl,
+                    )
+                return response
+
+            return wrapper
+
+        return decorator
@@ -0,0 +1,428 @@
+import csv
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import func
+from werkzeug.datastructures import MultiDict
+from wtforms import StringField
+from wtforms.validators import DataRequired, Regexp
+
+import assets
+import booking
+import counters
+import indexes
+import partitions
+from extensions import cache, db, matches, names
+from forms import ArtistForm, ShowForm, VenueForm
+from models import Artist, Genre, Venue, artist_genres, venue_genres
+
+fyyur = AppGroup("fyyur", help="Fyyur maintenance commands.")
+
+
+# ----------------------------------------------------------------------------#
+# Bulk import.
+#
+# CSV headers follow the form field names (name, city, state, address,
+# phone, genres, image_link, facebook_link, website_link, seeking_*,
+# seeking_description); genres are comma separated. Shows take
+# artist/venue names (or artist_id/venue_id), start_time and optionally
+# end_time; shows overlapping another at the venue or by the artist are
+# rejected.
+#
+# The import invalidates the cache tags and indexes it touched in this
+# process only. Servers using the per-process "lru" CACHE_BACKEND keep their
+# pages until CACHE_DEFAULT_TTL expires them, and their typeahead and match
+# indexes until TYPEAHEAD_REFRESH_SECONDS / MATCH_REFRESH_SECONDS; a backend
+# shared between processes sees the invalidations at once.
+# ----------------------------------------------------------------------------#
+
+# the web forms' phone is an IntegerField no formatted number passes, while
+# the create handlers store whatever string was submitted; imports take
+# digits with spaces, dots, dashes or parentheses, at least seven of them.
+PHONE_PATTERN = r"^\+?(?=(?:\D*\d){7})[0-9 ().-]{7,30}$"
+
+
+def import_form(form_class):
+    class ImportForm(form_class):
+        phone = StringField(
+            "phone",
+            validators=[
+                DataRequired(),
+                Regexp(PHONE_PATTERN, message="Not a phone number."),
+            ],
+        )
+
+    return ImportForm
+
+
+def form_errors(form):
+    return "; ".join(
+        f"{field}: {', '.join(errors)}" for field, errors in form.errors.items()
+    )
+
+
+def row_formdata(row):
+    data = MultiDict()
+    for key, value in row.items():
+        if key is None or value is None:
+            continue
+        if key == "genres":
+            for genre in value.split(","):
+                data.add("genres", genre.strip())
+        else:
+            data.add(key, value.strip())
+    return data
+
+
+def insert_returning_ids(table, rows):
+    # ids of the inserted rows, in order. Postgres uses one multi-row
+    # INSERT ... RETURNING; elsewhere ids are allocated above max(id) and the
+    # rows go in with one executemany (a concurrent writer makes the batch
+    # fail on the primary key rather than interleave).
+    if db.engine.dialect.name == "postgresql":
+        result = db.session.execute(
+            table.insert().values(rows).returning(table.c.id)
+        )
+        return [row.id for row in result]
+    start = db.session.query(func.coalesce(func.max(table.c.id), 0)).scalar() + 1
+    ids = list(range(start, start + len(rows)))
+    db.session.execute(
+        table.insert(), [{**row, "id": i} for i, row in zip(ids, rows)]
+    )
+    return ids
+
+
+def entity_rows(model, form_class, seeking_field, link, fk):
+    # returns a batch loader validating with form_class and inserting model
+    # rows plus their genre associations.
+    def load(batch):
+        valid, rejected = [], []
+        # binding a form is the expensive part; reuse one for the whole batch.
+        form = form_class(formdata=None, meta={"csrf": False})
+        for line, row in batch:
+            form.process(formdata=row_formdata(row))
+            if not form.validate():
+                rejected.append((line, row, form_errors(form)))
+                continue
+            values = {
+                "name": form.name.data,
+                "city": form.city.data,
+                "state": form.state.data,
+                "phone": form.phone.data,
+                "image_link": form.image_link.data or None,
+                "facebook_link": form.facebook_link.data,
+                "website": form.website_link.data or None,
+                seeking_field: form[seeking_field].data,
+                "seeking_description": form.seeking_description.data or None,
+            }
+            if "address" in form:
+                values["address"] = form.address.data
+            valid.append((values, form.genres.data))
+        if valid:
+            ids = insert_returning_ids(model.__table__, [v for v, _ in valid])
+            genres = {
+                g.name: g for g in Genre.resolve(g for _, gs in valid for g in gs)
+            }
+            db.session.flush()
+            links = [
+                {fk: entity_id, "genre_id": genres[name].id}
+                for entity_id, (_, names) in zip(ids, valid)
+                for name in dict.fromkeys(names)
+            ]
+            if links:
+                db.session.execute(link.insert(), links)
+        return len(valid), rejected, []
+
+    return load
+
+
+def resolve_names(model, names):
+    # name -> id for names matching exactly one row; ambiguous names map to None.
+    ids = {}
+    for entity_id, name in db.session.query(model.id, model.name).filter(
+        model.name.in_(set(names))
+    ):
+        ids[name] = None if name in ids else entity_id
+    return ids
+
+
+def load_shows(batch):
+    artists = resolve_names(Artist, [r["artist"] for _, r in batch if r.get("artist")])
+    venues = resolve_names(Venue, [r["venue"] for _, r in batch if r.get("venue")])
+    valid, rejected = [], []
+    form = ShowForm(formdata=None, meta={"csrf": False})
+    for line, row in batch:
+        formdata = row_formdata(row)
+        problems = []
+        for key, ids in (("artist", artists), ("venue", venues)):
+            name = row.get(key)
+            if not name:
+                continue
+            if ids.get(name) is None:
+                reason = "ambiguous" if name in ids else "unknown"
+                problems.append(f"{key}: {reason} name {name!r}")
+            else:
+                formdata[f"{key}_id"] = str(ids[name])
+        form.process(formdata=formdata)
+        if not form.validate():
+            problems.append(form_errors(form))
+        if not problems:
+            try:
+                artist_id = int(form.artist_id.data)
+                venue_id = int(form.venue_id.data)
+            except (TypeError, ValueError):
+                problems.append("artist_id/venue_id: must be an integer")
+        if not problems:
+            try:
+                length = booking.show_length(form.start_time.data, form.end_time.data)
+            except ValueError as e:
+                problems.append(f"end_time: {e}")
+        if problems:
+            rejected.append((line, row, "; ".join(problems)))
+            continue
+        values = {
+            "artist_id": artist_id,
+            "venue_id": venue_id,
+            "start_time": form.start_time.data,
+            "end_time": form.start_time.data + length,
+        }
+        valid.append((line, row, values))
+
+    # references given by id still have to exist.
+    known_artists = {
+        i
+        for i, in db.session.query(Artist.id).filter(
+            Artist.id.in_({v["artist_id"] for _, _, v in valid})
+        )
+    }
+    known_venues = {
+        i
+        for i, in db.session.query(Venue.id).filter(
+            Venue.id.in_({v["venue_id"] for _, _, v in valid})
+        )
+    }
+    candidates = []
+    for line, row, values in valid:
+        if values["artist_id"] not in known_artists:
+            rejected.append((line, row, f"artist_id: unknown id {values['artist_id']}"))
+        elif values["venue_id"] not in known_venues:
+            rejected.append((line, row, f"venue_id: unknown id {values['venue_id']}"))
+        else:
+            candidates.append((line, row, values))
+
+    # one query checks the whole batch, against itself too.
+    clashes = {
+        id(show): clash
+        for show, clash in booking.find_conflicts([v for _, _, v in candidates])
+    }
+    shows = []
+    for line, row, values in candidates:
+        clash = clashes.get(id(values))
+        if clash is None:
+            shows.append(values)
+        elif clash["id"] is None:
+            rejected.append((line, row, "start_time: overlaps an earlier row"))
+        else:
+            rejected.append((line, row, f"start_time: overlaps show {clash['id']}"))
+    if shows:
+        booking.book_shows(shows)
+    return len(shows), rejected, shows
+
+
+LOADERS = {
+    "venues": entity_rows(
+        Venue, import_form(VenueForm), "seeking_talent", venue_genres, "venue_id"
+    ),
+    "artists": entity_rows(
+        Artist, import_form(ArtistForm), "seeking_venue", artist_genres, "artist_id"
+    ),
+    "shows": load_shows,
+}
+
+
+def batches(reader, size):
+    batch = []
+    # line 1 is the header.
+    for line, row in enumerate(reader, start=2):
+        batch.append((line, row))
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+@fyyur.command("import")
+@click.argument("kind", type=click.Choice(sorted(LOADERS)))
+@click.argument("file", type=click.File("r", encoding="utf-8"))
+@click.option("--batch-size", default=1000, show_default=True)
+@click.option(
+    "--rejects",
+    type=click.File("w", encoding="utf-8"),
+    help="Write rejected rows, with an 'error' column, to this CSV.",
+)
+def import_rows(kind, file, batch_size, rejects):
+    """Bulk import venues, artists or shows from a CSV file.
+
+    Servers with the per-process lru cache show the imported rows once their
+    cached pages expire (CACHE_DEFAULT_TTL).
+    """
+    reader = csv.DictReader(file)
+    writer = None
+    if rejects:
+        writer = csv.DictWriter(rejects, fieldnames=[*reader.fieldnames, "error"])
+        writer.writeheader()
+
+    load = LOADERS[kind]
+    total_inserted = total_rejected = 0
+    started = time.perf_counter()
+    for number, batch in enumerate(batches(reader, batch_size), start=1):
+        batch_started = time.perf_counter()
+        try:
+            inserted, rejected, shows = load(batch)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        elapsed = time.perf_counter() - batch_started
+        total_inserted += inserted
+        total_rejected += len(rejected)
+        click.echo(
+            f"batch {number}: {inserted} inserted, {len(rejected)} rejected "
+            f"in {elapsed:.2f}s ({len(batch) / elapsed:,.0f} rows/s)"
+        )
+        for line, row, error in sorted(rejected, key=lambda r: r[0]):
+            click.echo(f"  line {line}: {error}", err=True)
+            if writer:
+                writer.writerow({**row, "error": error})
+        if shows:
+            cache.invalidate(
+                *{f"venue:{s['venue_id']}" for s in shows},
+                *{f"artist:{s['artist_id']}" for s in shows},
+            )
+
+    cache.invalidate(kind, *(("venues",) if kind == "shows" else ()))
+    names.invalidate(kind)
+    matches.invalidate(kind)
+    elapsed = time.perf_counter() - started
+    click.echo(
+        f"{total_inserted} {kind} imported, {total_rejected} rejected "
+        f"in {elapsed:.2f}s ({(total_inserted + total_rejected) / max(elapsed, 1e-9):,.0f} rows/s)"
+    )
+
+
+# ----------------------------------------------------------------------------#
+# Synthetic data.
+# ----------------------------------------------------------------------------#
+
+
+@fyyur.command("seed")
+@click.option("--shows", default=1000, show_default=True)
+@click.option("--venues", type=int, help="Defaults to shows / 20.")
+@click.option("--artists", type=int, help="Defaults to shows / 10.")
+@click.option("--random-seed", default=42, show_default=True)
+def seed_data(shows, venues, artists, random_seed):
+    """Fill the database with realistic synthetic venues, artists and shows."""
+    from seed import seed
+
+    started = time.perf_counter()
+    counts = seed(shows, venues, artists, random_seed)
+    cache.clear()
+    names.invalidate()
+    matches.invalidate()
+    click.echo(
+        f"seeded {counts['venues']} venues, {counts['artists']} artists and "
+        f"{counts['shows']} shows in {time.perf_counter() - started:.1f}s"
+    )
+
+
+# ----------------------------------------------------------------------------#
+# Show counters.
+# ----------------------------------------------------------------------------#
+
+
+@fyyur.command("rollover")
+@click.option(
+    "--since",
+    type=click.DateTime(),
+    help="UTC; defaults to 25 hours ago, so a daily run overlaps the last.",
+)
+@click.option("--full", is_flag=True, help="Recount every venue and artist.")
+def rollover(since, full):
+    """Move shows that have started from the upcoming to the past counters."""
+    now = datetime.now(timezone.utc)
+    if full:
+        updated = counters.recount_all(now)
+    else:
+        since = (
+            since.replace(tzinfo=timezone.utc) if since else now - timedelta(hours=25)
+        )
+        updated = counters.rollover(since, now)
+    db.session.commit()
+    cache.invalidate("venues", "artists")
+    click.echo(f"recounted {updated[Venue]} venues and {updated[Artist]} artists")
+
+
+@fyyur.command("rotate-shows")
+@click.option(
+    "--months-ahead",
+    default=3,
+    show_default=True,
+    help="Postgres: create monthly partitions this far ahead.",
+)
+def rotate_shows(months_ahead):
+    """Add upcoming Show partitions (Postgres) or archive started shows (SQLite)."""
+    created, archived = partitions.rotate(months_ahead=months_ahead)
+    db.session.commit()
+    for name in created:
+        click.echo(f"created partition {name}")
+    click.echo(f"{len(created)} partitions created, {archived} shows archived")
+
+
+# ----------------------------------------------------------------------------#
+# Static assets.
+# ----------------------------------------------------------------------------#
+
+
+@fyyur.command("build-static")
+@click.option("--level", default=9, show_default=True, help="Compression level.")
+def build_static(level):
+    """Fingerprint static files and write precompressed .br/.gz copies."""
+    app = current_app._get_current_object()
+    if not os.path.isdir(app.static_folder):
+        raise click.ClickException(f"no static folder at {app.static_folder}")
+    manifest = assets.build(app.static_folder, app.config["STATIC_BUILD_DIR"], level)
+    app.extensions["assets"] = manifest
+    click.echo(
+        f"built {len(manifest['files'])} files, "
+        f"{len(manifest['encodings'])} precompressed, into "
+        f"{os.path.join(app.static_folder, app.config['STATIC_BUILD_DIR'])}"
+    )
+
+
+# ----------------------------------------------------------------------------#
+# Index checks.
+# ----------------------------------------------------------------------------#
+
+
+@fyyur.command("check-indexes")
+@click.option("--verbose", is_flag=True, help="Print every query plan.")
+def check_indexes(verbose):
+    """EXPLAIN the hot listing/detail queries and fail if an index is unused."""
+    # tests/test_indexes.py asserts the same; this reports it on a live
+    # database.
+    failed = False
+    try:
+        for route, index, plan, ok in indexes.plans():
+            failed = failed or not ok
+            click.echo(f"{'ok  ' if ok else 'FAIL'} {route}: {index}")
+            if verbose or not ok:
+                click.echo("\n".join(f"    {line}" for line in plan.splitlines()))
+    finally:
+        db.session.rollback()
+    if failed:
+        raise click.ClickException("hot queries are not using their indexes")
@@ -0,0 +1,67 @@
+import gzip
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # in requirements.txt; without it, gzip only.
+    brotli = None
+
+# ----------------------------------------------------------------------------#
+# Response compression.
+#
+# Dynamic responses of an allowlisted type and at least COMPRESS_MIN_SIZE
+# bytes are brotli (when installed) or gzip encoded, whichever the client
+# prefers among those it accepts. Streamed responses (the NDJSON export)
+# and files (static assets, served precompressed by assets.py) pass through.
+# ----------------------------------------------------------------------------#
+
+
+def encodings():
+    # the available encodings, best first.
+    return (["br"] if brotli is not None else []) + ["gzip"]
+
+
+def negotiate(accept_encoding, available):
+    # the available encoding the client weighs highest, or None.
+    quality = {encoding: accept_encoding[encoding] for encoding in available}
+    best = max(available, key=lambda encoding: quality[encoding])
+    return best if quality[best] > 0 else None
+
+
+def compress(data, encoding, level):
+    if encoding == "br":
+        return brotli.compress(data, quality=min(level, 11))
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def compress_response(response):
+    config = current_app.config
+    if (
+        response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or response.direct_passthrough
+        or response.is_streamed
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in config["COMPRESS_MIMETYPES"]
+    ):
+        return response
+    # the representation depends on Accept-Encoding from here on.
+    response.vary.add("Accept-Encoding")
+    data = response.get_data()
+    if len(data) < config["COMPRESS_MIN_SIZE"]:
+        return response
+    encoding = negotiate(request.accept_encodings, encodings())
+    if encoding is None:
+        return response
+
+    response.set_data(compress(data, encoding, config["COMPRESS_LEVEL"]))
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def init_app(app):
+    app.config.setdefault("COMPRESS_MIMETYPES", {"text/html", "application/json"})
+    app.config.setdefault("COMPRESS_MIN_SIZE", 1024)
+    app.config.setdefault("COMPRESS_LEVEL", 6)
+    app.after_request(compress_response)
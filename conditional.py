@@ -0,0 +1,62 @@
+import hashlib
+from datetime import timezone
+from functools import wraps
+
+from flask import Response, make_response, request, session
+
+# ----------------------------------------------------------------------------#
+# Conditional GETs.
+#
+# A view decorated with @conditional(validator) answers If-None-Match /
+# If-Modified-Since with a 304 before rendering. validator(**view_kwargs)
+# runs one cheap query and returns (last_modified, *values) describing
+# everything the page shows, or None when the page can't be validated (e.g.
+# a 404); the weak ETag hashes those values with the request path.
+# ----------------------------------------------------------------------------#
+
+
+def etag_for(values):
+    digest = hashlib.sha1(repr((request.full_path, values)).encode()).hexdigest()
+    return digest[:32]
+
+
+def not_modified(etag, last_modified):
+    # If-None-Match wins over If-Modified-Since when both are sent.
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    since = request.if_modified_since
+    return since is not None and last_modified is not None and last_modified <= since
+
+
+def conditional(validator):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            # pages carrying flashed messages are per-user; always render them.
+            if request.method != "GET" or session.get("_flashes"):
+                return view(**kwargs)
+            values = validator(**kwargs)
+            if values is None:
+                return view(**kwargs)
+
+            etag = etag_for(values)
+            last_modified = values[0]
+            if last_modified is not None:
+                # HTTP dates have whole-second resolution.
+                last_modified = last_modified.replace(microsecond=0)
+                if last_modified.tzinfo is None:
+                    last_modified = last_modified.replace(tzinfo=timezone.utc)
+            if not_modified(etag, last_modified):
+                response = Response(status=304)
+            else:
+                response = make_response(view(**kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            return response
+
+        return wrapper
+
+    return decorator
@@ -1,15 +1,191 @@
 import os
 
-SECRET_KEY = os.urandom(32)
 # Grabs the folder where the script runs.
 basedir = os.path.abspath(os.path.dirname(__file__))
 
-# Enable debug mode.
-DEBUG = True
 
-# Connect to the database
+def env_int(name, default):
+    return int(os.environ.get(name, default))
 
 
-# TODO IMPLEMENT DATABASE URL
-SQLALCHEMY_DATABASE_URI = "postgresql://PC@localhost:5432/fyurrdb"
-SQLALCHEMY_TRACK_MODIFICATIONS = True
+def env_bool(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def engine_options(database_uri):
+    # SQLALCHEMY_ENGINE_OPTIONS for the given URL, tunable per deployment via
+    # DB_* environment variables. SQLite uses its own single-file pools and
+    # takes none of these.
+    if database_uri.startswith("sqlite"):
+        return {}
+    options = {
+        "pool_size": env_int("DB_POOL_SIZE", 5),
+        "max_overflow": env_int("DB_MAX_OVERFLOW", 10),
+        "pool_timeout": env_int("DB_POOL_TIMEOUT", 30),
+        # recycle before server/proxy idle timeouts close connections under us.
+        "pool_recycle": env_int("DB_POOL_RECYCLE", 1800),
+        "pool_pre_ping": env_bool("DB_POOL_PRE_PING", True),
+    }
+    if database_uri.startswith("postgresql"):
+        options["connect_args"] = {
+            "application_name": os.environ.get("DB_APPLICATION_NAME", "fyyur"),
+            "options": "-c statement_timeout=%d"
+            % env_int("DB_STATEMENT_TIMEOUT_MS", 5000),
+        }
+    return options
+
+
+class Config:
+    # Profiles are instantiated by get_config(); the settings taken from the
+    # environment are read then, when create_app() loads the profile, rather
+    # than when this module is imported.
+    DEBUG = False
+    TESTING = False
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Pagination
+    SHOWS_PER_PAGE = 50
+    LISTING_PAGE_SIZE = 100
+    MAX_PAGE_SIZE = 200
+    SEARCH_PAGE_SIZE = 20
+
+    # Response cache: "lru" (per process), "null", or a cache.CacheBackend
+    # instance for a backend shared between workers. Writes invalidate pages
+    # precisely; the TTL (CACHE_DEFAULT_TTL) bounds staleness across processes
+    # with the lru backend.
+    CACHE_BACKEND = "lru"
+
+    # JSON API
+    API_PAGE_SIZE = 100
+    EXPORT_BATCH_SIZE = 1000
+
+    # Typeahead (see typeahead.py): in-memory name indexes, reloaded from the
+    # database every TYPEAHEAD_REFRESH_SECONDS to pick up writes made by other
+    # processes.
+    TYPEAHEAD_LIMIT = 10
+    MAX_TYPEAHEAD_LIMIT = 50
+
+    # Show booking (see booking.py and recurrence.py): the longest show, the
+    # most shows one booking may create, and the widest /availability window.
+    # A show without an end time runs SHOW_DEFAULT_MINUTES.
+    SHOW_MAX_MINUTES = 24 * 60
+    MAX_OCCURRENCES = 104
+    AVAILABILITY_DEFAULT_DAYS = 30
+    AVAILABILITY_MAX_DAYS = 366
+
+    # Artist-venue matching (see matching.py): in-memory inverted indexes,
+    # reloaded every MATCH_REFRESH_SECONDS to pick up writes made by other
+    # processes.
+    MATCH_LIMIT = 20
+    MAX_MATCH_LIMIT = 100
+
+    # Compression (see compression.py) of dynamic responses, and static assets
+    # (see assets.py) built by `flask fyyur build-static` into STATIC_BUILD_DIR
+    # under the static folder.
+    COMPRESS_MIMETYPES = {
+        "text/html",
+        "text/plain",
+        "text/css",
+        "application/json",
+        "application/javascript",
+        "image/svg+xml",
+    }
+    COMPRESS_MIN_SIZE = 1024
+    COMPRESS_LEVEL = 6
+    STATIC_BUILD_DIR = "build"
+    STATIC_MAX_AGE = 365 * 24 * 3600
+
+    # SQL instrumentation (see instrumentation.py); statements slower than
+    # SLOW_QUERY_MS are logged.
+    N_PLUS_ONE_THRESHOLD = 5
+    SERVER_TIMING = True
+    ENFORCE_QUERY_BUDGETS = False
+    # most statements a page may issue on a cache miss, by endpoint; streamed
+    # responses can't have one.
+    QUERY_BUDGETS = {
+        "venues.index": 1,
+        "artists.index": 1,
+        "shows.index": 1,
+        "venues.show_venue": 4,
+        "artists.show_artist": 4,
+        "venues.search_venues": 1,
+        "artists.search_artists": 1,
+        "api.venues": 2,
+        "api.artists": 2,
+        "api.shows": 1,
+        "typeahead.lookup": 1,
+        "venues.venue_availability": 2,
+        "artists.artist_availability": 2,
+        "venues.venue_matches": 4,
+        "artists.artist_matches": 4,
+    }
+
+    def __init__(self, database_url=None):
+        # the settings taken from the environment; a database_url given here
+        # overrides the profile's.
+        self.SECRET_KEY = os.environ.get("SECRET_KEY") or os.urandom(32)
+
+        # Connect to the database
+        self.SQLALCHEMY_DATABASE_URI = database_url or self.database_url()
+        self.SQLALCHEMY_ENGINE_OPTIONS = engine_options(self.SQLALCHEMY_DATABASE_URI)
+
+        # Optional read replica (see routing.py); reads on GET and search
+        # routes use it, and a client's requests stay on the primary for a
+        # few seconds after it writes.
+        self.SQLALCHEMY_BINDS = (
+            {"replica": os.environ["REPLICA_DATABASE_URL"]}
+            if os.environ.get("REPLICA_DATABASE_URL")
+            else {}
+        )
+        self.REPLICA_READ_YOUR_WRITES_SECONDS = env_int(
+            "REPLICA_READ_YOUR_WRITES_SECONDS", 5
+        )
+
+        self.CACHE_DEFAULT_TTL = env_int("CACHE_DEFAULT_TTL", 60)
+        self.CACHE_MAX_ENTRIES = env_int("CACHE_MAX_ENTRIES", 1024)
+        self.TYPEAHEAD_REFRESH_SECONDS = env_int("TYPEAHEAD_REFRESH_SECONDS", 300)
+        self.SHOW_DEFAULT_MINUTES = env_int("SHOW_DEFAULT_MINUTES", 180)
+        self.MATCH_REFRESH_SECONDS = env_int("MATCH_REFRESH_SECONDS", 300)
+        self.SLOW_QUERY_MS = env_int("SLOW_QUERY_MS", 200)
+
+    def database_url(self):
+        return os.environ.get("DATABASE_URL", "postgresql://PC@localhost:5432/fyurrdb")
+
+
+class DevelopmentConfig(Config):
+    # Enable debug mode.
+    DEBUG = True
+    SQLALCHEMY_TRACK_MODIFICATIONS = True
+
+
+class TestingConfig(Config):
+    TESTING = True
+    ENFORCE_QUERY_BUDGETS = True
+    WTF_CSRF_ENABLED = False
+
+    def database_url(self):
+        return os.environ.get("TEST_DATABASE_URL", "sqlite://")
+
+
+class ProductionConfig(Config):
+    def database_url(self):
+        # no fallback: a worker must not quietly connect to a local database.
+        if not os.environ.get("DATABASE_URL"):
+            raise RuntimeError("DATABASE_URL must be set in production")
+        return os.environ["DATABASE_URL"]
+
+
+profiles = {
+    "development": DevelopmentConfig,
+    "testing": TestingConfig,
+    "production": ProductionConfig,
+}
+
+
+def get_config(name=None):
+    # the profile named by FYYUR_CONFIG, development by default, read from
+    # the environment now.
+    return profiles[name or os.environ.get("FYYUR_CONFIG", "development")]()
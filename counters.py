@@ -0,0 +1,94 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import bindparam, func, select, update
+
+from extensions import db
+import partitions
+from models import Artist, Venue, as_utc
+
+# ----------------------------------------------------------------------------#
+# Show counters.
+#
+# Venue and Artist carry upcoming_shows_count and past_shows_count so the
+# listings read a column instead of aggregating Show. Writers adjust them in
+# the same transaction as the shows they add, deletion.py recounts what a
+# delete touches, and `flask fyyur rollover` moves shows that have started
+# from upcoming to past.
+# ----------------------------------------------------------------------------#
+
+# counted model and the Show column referencing it.
+COUNTED = ((Venue, "venue_id"), (Artist, "artist_id"))
+
+
+def show_deltas(shows, now=None):
+    # {model: {id: [upcoming, past]}} for (venue_id, artist_id, start_time)
+    # tuples.
+    now = now or datetime.now(timezone.utc)
+    deltas = {model: {} for model, _ in COUNTED}
+    for venue_id, artist_id, start_time in shows:
+        if start_time is None:
+            continue
+        # naive times (sqlite, form input) are UTC.
+        slot = 0 if as_utc(start_time) > now else 1
+        for model, entity_id in ((Venue, venue_id), (Artist, artist_id)):
+            deltas[model].setdefault(entity_id, [0, 0])[slot] += 1
+    return deltas
+
+
+def apply_deltas(deltas):
+    for model, by_id in deltas.items():
+        if not by_id:
+            continue
+        table = model.__table__
+        db.session.execute(
+            update(table)
+            .where(table.c.id == bindparam("_id"))
+            .values(
+                upcoming_shows_count=table.c.upcoming_shows_count
+                + bindparam("_upcoming"),
+                past_shows_count=table.c.past_shows_count + bindparam("_past"),
+            ),
+            [
+                {"_id": entity_id, "_upcoming": upcoming, "_past": past}
+                for entity_id, (upcoming, past) in by_id.items()
+            ],
+        )
+
+
+def shows_added(shows, now=None):
+    apply_deltas(show_deltas(shows, now))
+
+
+def recount(model, fk, ids=None, now=None):
+    # recompute both counters from every show (archived ones included), for
+    # the ids (a collection or a select) or for every row; returns the number
+    # of rows updated.
+    now = now or datetime.now(timezone.utc)
+    table = model.__table__
+    shows = partitions.show_source()
+    counted = select(func.count(shows.id)).where(getattr(shows, fk) == table.c.id)
+    statement = update(table).values(
+        upcoming_shows_count=counted.where(shows.start_time > now).scalar_subquery(),
+        past_shows_count=counted.where(shows.start_time <= now).scalar_subquery(),
+    )
+    if ids is not None:
+        statement = statement.where(table.c.id.in_(ids))
+    return db.session.execute(statement).rowcount
+
+
+def recount_all(now=None):
+    return {model: recount(model, fk, now=now) for model, fk in COUNTED}
+
+
+def rollover(since, now=None):
+    # recount only the venues and artists with a show that started in
+    # (since, now]; recounting is idempotent, so overlapping runs are safe.
+    now = now or datetime.now(timezone.utc)
+    updated = {}
+    shows = partitions.show_source()
+    for model, fk in COUNTED:
+        started = select(getattr(shows, fk)).where(
+            shows.start_time > since, shows.start_time <= now
+        )
+        updated[model] = recount(model, fk, started.distinct(), now)
+    return updated
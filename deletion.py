@@ -0,0 +1,48 @@
+from sqlalchemy import delete
+
+import counters
+import partitions
+from extensions import db
+from models import Artist, Show, Venue, artist_genres, venue_genres
+
+# ----------------------------------------------------------------------------#
+# Set-based deletes.
+#
+# Venues and artists go with their shows (archived ones too) and genre links
+# in one statement per table, whatever the number of ids. The Show and genre
+# FKs cascade on Postgres; the explicit deletes keep SQLite, which doesn't
+# enforce foreign keys here, consistent and avoid loading any children.
+# ----------------------------------------------------------------------------#
+
+# model -> (its Show fk, genre link table, counterpart model, counterpart fk)
+RELATED = {
+    Venue: ("venue_id", venue_genres, Artist, "artist_id"),
+    Artist: ("artist_id", artist_genres, Venue, "venue_id"),
+}
+
+
+def delete_entities(model, ids):
+    # returns (ids deleted, counterpart ids that lost shows); the caller
+    # commits.
+    fk, link, counterpart, counterpart_fk = RELATED[model]
+    table = model.__table__
+    found = [i for i, in db.session.query(model.id).filter(model.id.in_(set(ids)))]
+    if not found:
+        return [], []
+
+    shows = partitions.show_source()
+    affected = [
+        i
+        for i, in db.session.query(getattr(shows, counterpart_fk))
+        .filter(getattr(shows, fk).in_(found))
+        .distinct()
+    ]
+    db.session.execute(delete(Show.__table__).where(Show.__table__.c[fk].in_(found)))
+    if partitions.has_archive():
+        archive = partitions.show_archive
+        db.session.execute(delete(archive).where(archive.c[fk].in_(found)))
+    db.session.execute(delete(link).where(link.c[fk].in_(found)))
+    db.session.execute(delete(table).where(table.c.id.in_(found)))
+    if affected:
+        counters.recount(counterpart, counterpart_fk, affected)
+    return found, affected
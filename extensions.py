@@ -0,0 +1,23 @@
+from flask_migrate import Migrate
+from flask_moment import Moment
+
+from cache import ResponseCache
+from matching import MatchIndex
+from routing import RoutingSQLAlchemy
+from typeahead import NameIndex
+
+# ----------------------------------------------------------------------------#
+# Extensions.
+#
+# Created unbound so that models and helpers can import them without an app;
+# create_app() binds them with init_app(). The response cache and the
+# in-memory indexes keep their state in app.extensions, so every app has its
+# own.
+# ----------------------------------------------------------------------------#
+
+db = RoutingSQLAlchemy()
+migrate = Migrate(render_as_batch=True)
+moment = Moment()
+cache = ResponseCache()
+names = NameIndex()
+matches = MatchIndex()
@@ -1,24 +1,41 @@
 from datetime import datetime
-from numbers import Number
-from xml.dom import ValidationErr
 from flask_wtf import Form
 from wtforms import (
     StringField,
     SelectField,
     SelectMultipleField,
     DateTimeField,
+    DateField,
     BooleanField,
     IntegerField,
 )
-from wtforms.validators import DataRequired, AnyOf, URL
+from wtforms.validators import DataRequired, AnyOf, URL, NumberRange, Optional
 
 
 class ShowForm(Form):
-    artist_id = StringField("artist_id")
-    venue_id = StringField("venue_id")
+    # the template attaches a picker backed by /api/typeahead/<kind>.
+    artist_id = StringField(
+        "artist_id", render_kw={"data-typeahead": "/api/typeahead/artists"}
+    )
+    venue_id = StringField(
+        "venue_id", render_kw={"data-typeahead": "/api/typeahead/venues"}
+    )
+    # called per form: a value computed at import would be the time the
+    # (preloaded) app started.
     start_time = DateTimeField(
-        "start_time", validators=[DataRequired()], default=datetime.today()
+        "start_time", validators=[DataRequired()], default=datetime.today
+    )
+    # optional; shows without one run SHOW_DEFAULT_MINUTES.
+    end_time = DateTimeField("end_time", validators=[Optional()])
+    # optional recurrence: repeat weekly or monthly, `count` times in all or
+    # through `until` (see recurrence.py).
+    repeat = SelectField(
+        "repeat",
+        choices=[("", "Does not repeat"), ("weekly", "Weekly"), ("monthly", "Monthly")],
+        default="",
     )
+    count = IntegerField("count", validators=[Optional(), NumberRange(min=1)])
+    until = DateField("until", validators=[Optional()])
 
 
 class VenueForm(Form):
@@ -0,0 +1,46 @@
+# ----------------------------------------------------------------------------#
+# SQLite FTS5 name index DDL.
+#
+# The one definition of the "<table>_fts" external content table and the
+# triggers keeping it in sync with <table>.name. models.py creates them with
+# the tables; the migrations that add them, or rebuild a table in batch mode
+# (which drops its triggers), import these too. Plain strings only, so the
+# migrations don't depend on the models.
+# ----------------------------------------------------------------------------#
+
+TRIGGERS = ("ai", "ad", "au")
+
+
+def fts_table(tablename):
+    return (
+        f'CREATE VIRTUAL TABLE "{tablename}_fts" USING fts5('
+        f"name, content='{tablename}', content_rowid='id')"
+    )
+
+
+def fts_triggers(tablename):
+    fts = f'"{tablename}_fts"'
+    return [
+        f'CREATE TRIGGER "{tablename}_fts_ai" AFTER INSERT ON "{tablename}" '
+        f"BEGIN INSERT INTO {fts}(rowid, name) VALUES (new.id, new.name); END",
+        f'CREATE TRIGGER "{tablename}_fts_ad" AFTER DELETE ON "{tablename}" '
+        f"BEGIN INSERT INTO {fts}({fts}, rowid, name) "
+        f"VALUES ('delete', old.id, old.name); END",
+        f'CREATE TRIGGER "{tablename}_fts_au" AFTER UPDATE OF name ON "{tablename}" '
+        f"BEGIN INSERT INTO {fts}({fts}, rowid, name) "
+        f"VALUES ('delete', old.id, old.name); "
+        f"INSERT INTO {fts}(rowid, name) VALUES (new.id, new.name); END",
+    ]
+
+
+def fts_rebuild(tablename):
+    # index the rows that already exist.
+    fts = f'"{tablename}_fts"'
+    return f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"
+
+
+def drop_fts(tablename):
+    return [
+        *(f'DROP TRIGGER IF EXISTS "{tablename}_fts_{suffix}"' for suffix in TRIGGERS),
+        f'DROP TABLE IF EXISTS "{tablename}_fts"',
+    ]
@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+import booking
+from artists import artist_listing_query
+from extensions import db
+from models import Artist, Show, Venue
+from shows import show_listing_query
+from venues import venue_areas_query
+from views import detail_shows_query
+
+# ----------------------------------------------------------------------------#
+# Index checks.
+#
+# The hot listing and detail queries with the index each must use, and their
+# query plans. On the partitioned Postgres schema the plans name each
+# partition's own index (e.g. "Show_2026_10_start_time_idx"), so an index
+# counts as used when the plan names it or any index attached to it.
+# tests/test_indexes.py asserts on the plans; `flask fyyur check-indexes`
+# prints them for a live database.
+# ----------------------------------------------------------------------------#
+
+
+class Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain)
+def compile_explain(element, compiler, **kw):
+    prefix = "EXPLAIN QUERY PLAN " if compiler.dialect.name == "sqlite" else "EXPLAIN "
+    return prefix + compiler.process(element.statement, **kw)
+
+
+def query_plan(query):
+    if db.engine.dialect.name == "postgresql":
+        # tiny tables make seq scans cheapest; ask whether the index is usable.
+        db.session.execute(text("SET LOCAL enable_seqscan = off"))
+    # read the DBAPI cursor directly: the wrapped select's result types
+    # (datetimes etc.) don't apply to plan rows.
+    rows = db.session.execute(Explain(query.statement)).cursor.fetchall()
+    return "\n".join(str(row[-1]) for row in rows)
+
+
+def index_names(index):
+    # the index and, on Postgres, every partition index attached to it.
+    if db.engine.dialect.name != "postgresql":
+        return {index}
+    children = db.session.execute(
+        text(
+            "WITH RECURSIVE attached(oid) AS ("
+            " SELECT CAST(:index AS regclass)::oid"
+            " UNION SELECT i.inhrelid FROM pg_inherits i"
+            " JOIN attached a ON i.inhparent = a.oid) "
+            "SELECT c.relname FROM attached a JOIN pg_class c ON c.oid = a.oid"
+        ),
+        {"index": f'"{index}"'},
+    ).scalars()
+    return {index, *children}
+
+
+def hot_queries():
+    # (route, query, index it must use)
+    current_time = datetime.now(timezone.utc)
+    return [
+        ("/venues", venue_areas_query(), "ix_Venue_city_state_name_id"),
+        ("/artists", artist_listing_query(), "ix_Artist_name_id"),
+        (
+            "rollover",
+            db.session.query(Show.venue_id)
+            .filter(Show.start_time > current_time - timedelta(days=1))
+            .filter(Show.start_time <= current_time),
+            "ix_Show_start_time",
+        ),
+        ("/shows", show_listing_query(Show).limit(50), "ix_Show_start_time"),
+        (
+            "/venues/<id>",
+            detail_shows_query("venue_id", 1, "artist_id", Artist),
+            "ix_Show_venue_id_start_time",
+        ),
+        (
+            "/artists/<id>",
+            detail_shows_query("artist_id", 1, "venue_id", Venue),
+            "ix_Show_artist_id_start_time",
+        ),
+        (
+            "/venues/<id>/availability",
+            booking.schedule_query(
+                Show, "venue_id", 1, current_time, current_time + timedelta(days=30)
+            ),
+            "ix_Show_venue_id_start_time",
+        ),
+    ]
+
+
+def plans():
+    # (route, index, plan, whether the plan uses the index) for every hot
+    # query.
+    results = []
+    for route, query, index in hot_queries():
+        plan = query_plan(query)
+        used = any(name in plan for name in index_names(index))
+        results.append((route, index, plan, used))
+    return results
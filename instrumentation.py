@@ -0,0 +1,123 @@
+import re
+import time
+from collections import Counter
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# ----------------------------------------------------------------------------#
+# Per-request SQL instrumentation.
+#
+# Counts statements and database time per request and reports them in a
+# Server-Timing header; logs slow statements and statement shapes repeated
+# within one request (N+1 candidates). With ENFORCE_QUERY_BUDGETS (on in
+# the testing profile) a route issuing more statements than its
+# QUERY_BUDGETS entry raises QueryBudgetExceeded. Streamed responses run
+# their queries while the body is sent, after the request is counted, so
+# they are neither reported nor budgeted.
+# ----------------------------------------------------------------------------#
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class RequestStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+
+_literals = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_placeholder_lists = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|:\w+|%s)\s*,?)+\)")
+
+
+def statement_shape(statement):
+    # collapse literals, IN lists and whitespace so repeats compare equal.
+    shape = _literals.sub("?", statement)
+    shape = _placeholder_lists.sub("(?)", shape)
+    return " ".join(shape.split())
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append((context, time.perf_counter()))
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()[1]
+    if not has_request_context() or "sql_stats" not in g:
+        return
+    stats = g.sql_stats
+    stats.count += 1
+    stats.duration += elapsed
+    stats.shapes[statement_shape(statement)] += 1
+    if elapsed * 1000 >= current_app.config["SLOW_QUERY_MS"]:
+        current_app.logger.warning(
+            "slow query (%.1f ms) on %s %s: %s",
+            elapsed * 1000,
+            request.method,
+            request.endpoint,
+            " ".join(statement.split()),
+        )
+
+
+def handle_error(exception_context):
+    # a failed statement never reaches after_cursor_execute; drop its entry
+    # so the connection's stack doesn't grow with every error it sees.
+    conn = exception_context.connection
+    started = conn.info.get("query_started") if conn is not None else None
+    if started and started[-1][0] is exception_context.execution_context:
+        started.pop()
+
+
+def start_request():
+    g.sql_stats = RequestStats()
+
+
+def finish_request(response):
+    stats = g.pop("sql_stats", None)
+    if stats is None or response.is_streamed:
+        return response
+    config = current_app.config
+    endpoint = request.endpoint
+
+    threshold = config["N_PLUS_ONE_THRESHOLD"]
+    for shape, count in stats.shapes.items():
+        if count >= threshold:
+            current_app.logger.warning(
+                "possible N+1 on %s: %d x %s", endpoint, count, shape
+            )
+
+    if config["SERVER_TIMING"]:
+        total = (time.perf_counter() - stats.started) * 1000
+        response.headers.add(
+            "Server-Timing",
+            f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries", '
+            f"app;dur={total:.2f}",
+        )
+
+    budget = config["QUERY_BUDGETS"].get(endpoint)
+    if config["ENFORCE_QUERY_BUDGETS"] and budget is not None and stats.count > budget:
+        raise QueryBudgetExceeded(
+            f"{endpoint} issued {stats.count} queries, budget is {budget}: "
+            + "; ".join(f"{n} x {s}" for s, n in stats.shapes.most_common())
+        )
+    return response
+
+
+def init_app(app):
+    app.config.setdefault("SLOW_QUERY_MS", 200)
+    app.config.setdefault("N_PLUS_ONE_THRESHOLD", 5)
+    app.config.setdefault("SERVER_TIMING", True)
+    app.config.setdefault("QUERY_BUDGETS", {})
+    app.config.setdefault("ENFORCE_QUERY_BUDGETS", False)
+    if not event.contains(Engine, "before_cursor_execute", before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", after_cursor_execute)
+        event.listen(Engine, "handle_error", handle_error)
+    app.before_request(start_request)
+    app.after_request(finish_request)
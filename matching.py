@@ -0,0 +1,207 @@
+import heapq
+import threading
+import time
+from collections import Counter
+
+from flask import current_app
+
+from typeahead import normalize
+
+# ----------------------------------------------------------------------------#
+# Artist-venue matching.
+#
+# Venues seeking talent are matched with artists seeking a venue, and the
+# other way round. A counterpart scores GENRE_WEIGHT per shared genre,
+# STATE_WEIGHT for the same state and CITY_WEIGHT more for the same city.
+# Only counterparts that are seeking are posted to the inverted indexes
+# (genre -> ids, state -> ids, (city, state) -> ids), so ranking touches the
+# postings of one entity's genres and place instead of every pair.
+# ----------------------------------------------------------------------------#
+
+GENRE_WEIGHT = 2
+STATE_WEIGHT = 1
+CITY_WEIGHT = 2
+
+
+def place(city, state):
+    return normalize(city), (state or "").upper()
+
+
+def shared_genres(profile, other):
+    wanted = {normalize(g) for g in profile["genres"]}
+    return [g for g in other["genres"] if normalize(g) in wanted]
+
+
+class Profiles:
+    # every entity of one kind by id, plus the postings of the seeking ones.
+    def __init__(self, rows=()):
+        self._profiles = {}
+        self._by_genre = {}
+        self._by_state = {}
+        self._by_city = {}
+        for row in rows:
+            self._put(*row)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._profiles)
+
+    def __contains__(self, id):
+        return id in self._profiles
+
+    def get(self, id):
+        return self._profiles.get(id)
+
+    def add(self, id, name, city, state, seeking, genres):
+        with self._lock:
+            self._discard(id)
+            self._put(id, name, city, state, seeking, genres)
+
+    def remove(self, id):
+        with self._lock:
+            self._discard(id)
+
+    def _postings(self, profile):
+        # entities without a place don't all share the empty one.
+        city, state = place(profile["city"], profile["state"])
+        if state:
+            yield self._by_state, state
+            if city:
+                yield self._by_city, (city, state)
+        for genre in profile["genres"]:
+            yield self._by_genre, normalize(genre)
+
+    def _put(self, id, name, city, state, seeking, genres):
+        profile = {
+            "name": name,
+            "city": city,
+            "state": state,
+            "seeking": bool(seeking),
+            "genres": sorted(set(genres)),
+        }
+        self._profiles[id] = profile
+        if profile["seeking"]:
+            for postings, key in self._postings(profile):
+                postings.setdefault(key, set()).add(id)
+
+    def _discard(self, id):
+        profile = self._profiles.pop(id, None)
+        if profile is None or not profile["seeking"]:
+            return
+        for postings, key in self._postings(profile):
+            ids = postings.get(key)
+            if ids is not None:
+                ids.discard(id)
+                if not ids:
+                    del postings[key]
+
+    def rank(self, profile, limit):
+        # [(id, score, profile)] of the best seeking entities for a profile
+        # of the other kind, best first, ties by id.
+        city, state = place(profile["city"], profile["state"])
+        scores = Counter()
+        with self._lock:
+            for genre in {normalize(g) for g in profile["genres"]}:
+                for id in self._by_genre.get(genre, ()):
+                    scores[id] += GENRE_WEIGHT
+            for id in self._by_state.get(state, ()):
+                scores[id] += STATE_WEIGHT
+            for id in self._by_city.get((city, state), ()):
+                scores[id] += CITY_WEIGHT
+            best = heapq.nlargest(
+                limit, scores.items(), key=lambda item: (item[1], -item[0])
+            )
+            return [(id, score, self._profiles[id]) for id, score in best]
+
+
+# ----------------------------------------------------------------------------#
+# Match indexes.
+#
+# One Profiles per kind ("venues", "artists"), loaded on first use, kept
+# current by the write handlers and reloaded every MATCH_REFRESH_SECONDS to
+# pick up writes made by other processes. Every app has its own indexes.
+# ----------------------------------------------------------------------------#
+
+
+class MatchIndexes:
+    # one app's indexes.
+    def __init__(self, loaders, counterparts, refresh=None):
+        self.loaders = loaders
+        self.counterparts = counterparts
+        self.refresh = refresh
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def index(self, kind):
+        loaded = self._indexes.get(kind)
+        if loaded is None or (
+            self.refresh and time.monotonic() - loaded[1] > self.refresh
+        ):
+            with self._lock:
+                loaded = (Profiles(self.loaders[kind]()), time.monotonic())
+                self._indexes[kind] = loaded
+        return loaded[0]
+
+    def matches(self, kind, id, limit=20):
+        # (profile, ranked counterparts) for the entity, or None if unknown.
+        # Entities not seeking get no matches.
+        profile = self.index(kind).get(id)
+        if profile is None:
+            return None
+        if not profile["seeking"]:
+            return profile, []
+        return profile, self.index(self.counterparts[kind]).rank(profile, limit)
+
+    def add(self, kind, id, name, city, state, seeking, genres):
+        if kind in self._indexes:
+            self._indexes[kind][0].add(id, name, city, state, seeking, genres)
+
+    def remove(self, kind, id):
+        if kind in self._indexes:
+            self._indexes[kind][0].remove(id)
+
+    def invalidate(self, *kinds):
+        for kind in kinds or list(self._indexes):
+            self._indexes.pop(kind, None)
+
+
+class MatchIndex:
+    # the extension: sources are registered once, the indexes of the current
+    # app are used.
+    def __init__(self, app=None):
+        self.loaders = {}
+        self.counterparts = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions["matching"] = MatchIndexes(
+            self.loaders,
+            self.counterparts,
+            app.config.get("MATCH_REFRESH_SECONDS", 300),
+        )
+
+    def source(self, kind, counterpart, loader):
+        # loader() returns (id, name, city, state, seeking, [genre names])
+        # rows for every entity of this kind.
+        self.loaders[kind] = loader
+        self.counterparts[kind] = counterpart
+
+    @property
+    def indexes(self):
+        return current_app.extensions["matching"]
+
+    def index(self, kind):
+        return self.indexes.index(kind)
+
+    def matches(self, kind, id, limit=20):
+        return self.indexes.matches(kind, id, limit)
+
+    def add(self, kind, id, name, city, state, seeking, genres):
+        self.indexes.add(kind, id, name, city, state, seeking, genres)
+
+    def remove(self, kind, id):
+        self.indexes.remove(kind, id)
+
+    def invalidate(self, *kinds):
+        self.indexes.invalidate(*kinds)
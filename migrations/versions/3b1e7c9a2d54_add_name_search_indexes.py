@@ -0,0 +1,48 @@
+"""add name search indexes
+
+Revision ID: 3b1e7c9a2d54
+Revises: f40029be3894
+Create Date: 2026-10-18 09:12:40.118305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from fts import drop_fts, fts_rebuild, fts_table, fts_triggers
+
+
+# revision identifiers, used by Alembic.
+revision = '3b1e7c9a2d54'
+down_revision = 'f40029be3894'
+branch_labels = None
+depends_on = None
+
+
+TABLES = ('Venue', 'Artist')
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for name in TABLES:
+            op.execute(
+                f'CREATE INDEX "ix_{name}_name_trgm" '
+                f'ON "{name}" USING gin (name gin_trgm_ops)'
+            )
+    elif dialect == 'sqlite':
+        for name in TABLES:
+            for statement in [fts_table(name), *fts_triggers(name)]:
+                op.execute(statement)
+            op.execute(fts_rebuild(name))
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        for name in TABLES:
+            op.execute(f'DROP INDEX IF EXISTS "ix_{name}_name_trgm"')
+    elif dialect == 'sqlite':
+        for name in TABLES:
+            for statement in drop_fts(name):
+                op.execute(statement)
@@ -0,0 +1,30 @@
+"""add show lookup and venue area indexes
+
+Revision ID: 5d9e0b3f7a21
+Revises: 8c4f2a6e1b07
+Create Date: 2026-10-18 11:20:54.270913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d9e0b3f7a21'
+down_revision = '8c4f2a6e1b07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_Show_venue_id_start_time', 'Show', ['venue_id', 'start_time'], unique=False)
+    op.create_index('ix_Show_artist_id_start_time', 'Show', ['artist_id', 'start_time'], unique=False)
+    op.create_index('ix_Show_start_time', 'Show', ['start_time'], unique=False)
+    op.create_index('ix_Venue_city_state', 'Venue', ['city', 'state'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_Venue_city_state', table_name='Venue')
+    op.drop_index('ix_Show_start_time', table_name='Show')
+    op.drop_index('ix_Show_artist_id_start_time', table_name='Show')
+    op.drop_index('ix_Show_venue_id_start_time', table_name='Show')
@@ -0,0 +1,106 @@
+"""normalize genres into Genre with association tables
+
+Revision ID: 8c4f2a6e1b07
+Revises: 3b1e7c9a2d54
+Create Date: 2026-10-18 10:03:27.512846
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from fts import fts_triggers
+
+
+# revision identifiers, used by Alembic.
+revision = '8c4f2a6e1b07'
+down_revision = '3b1e7c9a2d54'
+branch_labels = None
+depends_on = None
+
+
+# (entity table, association table, association fk column)
+LINKS = (
+    ('Venue', 'VenueGenre', 'venue_id'),
+    ('Artist', 'ArtistGenre', 'artist_id'),
+)
+
+
+def recreate_fts_triggers(name):
+    # sqlite batch mode rebuilds the table, which drops its triggers.
+    for statement in fts_triggers(name):
+        op.execute(statement)
+
+
+def upgrade():
+    genre = op.create_table('Genre',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=120), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    links = {}
+    for name, link, fk in LINKS:
+        links[name] = op.create_table(link,
+        sa.Column(fk, sa.Integer(), nullable=False),
+        sa.Column('genre_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint([fk], [f'{name}.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['genre_id'], ['Genre.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint(fk, 'genre_id')
+        )
+        op.create_index(f'ix_{link}_genre_id', link, ['genre_id', fk], unique=False)
+
+    # backfill from the ", " joined strings.
+    bind = op.get_bind()
+    parsed = {}
+    for name, link, fk in LINKS:
+        rows = bind.execute(sa.text(f'SELECT id, genres FROM "{name}"'))
+        parsed[name] = [
+            (row.id, [g.strip() for g in (row.genres or '').split(',') if g.strip()])
+            for row in rows
+        ]
+    names = sorted({g for rows in parsed.values() for _, genres in rows for g in genres})
+    if names:
+        op.bulk_insert(genre, [{'name': n} for n in names])
+        ids = dict(
+            (row.name, row.id)
+            for row in bind.execute(sa.text('SELECT id, name FROM "Genre"'))
+        )
+        for name, link, fk in LINKS:
+            pairs = {
+                (entity_id, ids[g]) for entity_id, genres in parsed[name] for g in genres
+            }
+            if pairs:
+                op.bulk_insert(
+                    links[name], [{fk: e, 'genre_id': g} for e, g in sorted(pairs)]
+                )
+
+    for name, link, fk in LINKS:
+        with op.batch_alter_table(name, schema=None) as batch_op:
+            batch_op.drop_column('genres')
+        if bind.dialect.name == 'sqlite':
+            recreate_fts_triggers(name)
+
+
+def downgrade():
+    bind = op.get_bind()
+    lengths = {'Venue': 500, 'Artist': 120}
+    for name, link, fk in LINKS:
+        with op.batch_alter_table(name, schema=None) as batch_op:
+            batch_op.add_column(
+                sa.Column('genres', sa.String(length=lengths[name]), nullable=True)
+            )
+        rows = bind.execute(sa.text(
+            f'SELECT l.{fk} AS id, g.name FROM "{link}" l '
+            f'JOIN "Genre" g ON g.id = l.genre_id ORDER BY l.{fk}, g.name'
+        ))
+        joined = {}
+        for row in rows:
+            joined.setdefault(row.id, []).append(row.name)
+        for entity_id, genres in joined.items():
+            bind.execute(
+                sa.text(f'UPDATE "{name}" SET genres = :genres WHERE id = :id'),
+                {'genres': ', '.join(genres)[:lengths[name]], 'id': entity_id},
+            )
+        op.drop_index(f'ix_{link}_genre_id', table_name=link)
+        op.drop_table(link)
+    op.drop_table('Genre')
@@ -0,0 +1,63 @@
+"""add upcoming/past show counters to Venue and Artist
+
+Revision ID: a7c3e9f14b62
+Revises: 5d9e0b3f7a21
+Create Date: 2026-10-18 13:42:08.118364
+
+"""
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+from fts import fts_triggers
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c3e9f14b62'
+down_revision = '5d9e0b3f7a21'
+branch_labels = None
+depends_on = None
+
+
+# (counted table, Show fk column)
+COUNTED = (
+    ('Venue', 'venue_id'),
+    ('Artist', 'artist_id'),
+)
+
+
+def recreate_fts_triggers(name):
+    # sqlite batch mode rebuilds the table, which drops its triggers.
+    for statement in fts_triggers(name):
+        op.execute(statement)
+
+
+def upgrade():
+    for name, fk in COUNTED:
+        with op.batch_alter_table(name, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('upcoming_shows_count', sa.Integer(), server_default='0', nullable=False))
+            batch_op.add_column(sa.Column('past_shows_count', sa.Integer(), server_default='0', nullable=False))
+
+    # backfill with the same correlated counts `flask fyyur rollover --full` uses.
+    now = sa.bindparam('now', datetime.now(timezone.utc), type_=sa.DateTime(timezone=True))
+    show = sa.table('Show', sa.column('id'), sa.column('venue_id'), sa.column('artist_id'), sa.column('start_time'))
+    for name, fk in COUNTED:
+        entity = sa.table(name, sa.column('id'), sa.column('upcoming_shows_count'), sa.column('past_shows_count'))
+        counted = sa.select(sa.func.count(show.c.id)).where(show.c[fk] == entity.c.id)
+        op.execute(
+            entity.update().values(
+                upcoming_shows_count=counted.where(show.c.start_time > now).scalar_subquery(),
+                past_shows_count=counted.where(show.c.start_time <= now).scalar_subquery(),
+            )
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    for name, fk in reversed(COUNTED):
+        with op.batch_alter_table(name, schema=None) as batch_op:
+            batch_op.drop_column('past_shows_count')
+            batch_op.drop_column('upcoming_shows_count')
+        if bind.dialect.name == 'sqlite':
+            recreate_fts_triggers(name)
@@ -0,0 +1,170 @@
+"""partition Show by month (postgres) or split off Show_archive (sqlite)
+
+Revision ID: b4d81f0c6e39
+Revises: a7c3e9f14b62
+Create Date: 2026-10-18 15:06:51.402217
+
+"""
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4d81f0c6e39'
+down_revision = 'a7c3e9f14b62'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = (
+    ('venue_id_start_time', ['venue_id', 'start_time']),
+    ('artist_id_start_time', ['artist_id', 'start_time']),
+    ('start_time', ['start_time']),
+)
+
+# partitions are created this many months past the current one; `flask fyyur
+# rotate-shows` keeps extending them.
+MONTHS_AHEAD = 3
+
+
+def next_month(month):
+    return month.replace(year=month.year + month.month // 12, month=month.month % 12 + 1)
+
+
+def check_start_times(bind):
+    missing = bind.execute(sa.text('SELECT count(*) FROM "Show" WHERE start_time IS NULL')).scalar()
+    if missing:
+        raise RuntimeError(
+            f'{missing} shows have no start_time; set or delete them before upgrading'
+        )
+
+
+def upgrade():
+    bind = op.get_bind()
+    check_start_times(bind)
+    if bind.dialect.name == 'postgresql':
+        upgrade_postgresql(bind)
+    elif bind.dialect.name == 'sqlite':
+        upgrade_sqlite()
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        downgrade_postgresql()
+    elif bind.dialect.name == 'sqlite':
+        downgrade_sqlite()
+
+
+# ----------------------------------------------------------------------------#
+# Postgres: monthly range partitions plus a default partition. The primary
+# key has to include the partition key, so it becomes (id, start_time).
+# ----------------------------------------------------------------------------#
+
+
+def upgrade_postgresql(bind):
+    for name, _ in INDEXES:
+        op.drop_index(f'ix_Show_{name}', table_name='Show')
+    op.execute('ALTER TABLE "Show" RENAME TO "Show_unpartitioned"')
+    op.execute('ALTER TABLE "Show_unpartitioned" RENAME CONSTRAINT "Show_pkey" TO "Show_unpartitioned_pkey"')
+    op.execute('ALTER SEQUENCE "Show_id_seq" OWNED BY NONE')
+    op.execute(
+        'CREATE TABLE "Show" ('
+        'id integer NOT NULL DEFAULT nextval(\'"Show_id_seq"\'::regclass), '
+        'start_time timestamp with time zone NOT NULL, '
+        'artist_id integer NOT NULL REFERENCES "Artist" (id), '
+        'venue_id integer NOT NULL REFERENCES "Venue" (id), '
+        'CONSTRAINT "Show_pkey" PRIMARY KEY (id, start_time)'
+        ') PARTITION BY RANGE (start_time)'
+    )
+    op.execute('CREATE TABLE "Show_default" PARTITION OF "Show" DEFAULT')
+
+    now = datetime.now(timezone.utc)
+    first = bind.execute(sa.text('SELECT min(start_time) FROM "Show_unpartitioned"')).scalar() or now
+    month = datetime(min(first, now).year, min(first, now).month, 1, tzinfo=timezone.utc)
+    last = datetime(now.year, now.month, 1, tzinfo=timezone.utc)
+    for _ in range(MONTHS_AHEAD):
+        last = next_month(last)
+    while month <= last:
+        op.execute(
+            f'CREATE TABLE "Show_{month:%Y_%m}" PARTITION OF "Show" '
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month(month).isoformat()}')"
+        )
+        month = next_month(month)
+
+    op.execute(
+        'INSERT INTO "Show" (id, start_time, artist_id, venue_id) '
+        'SELECT id, start_time, artist_id, venue_id FROM "Show_unpartitioned"'
+    )
+    op.drop_table('Show_unpartitioned')
+    op.execute('ALTER SEQUENCE "Show_id_seq" OWNED BY "Show".id')
+    for name, columns in INDEXES:
+        op.create_index(f'ix_Show_{name}', 'Show', columns, unique=False)
+
+
+def downgrade_postgresql():
+    for name, _ in INDEXES:
+        op.drop_index(f'ix_Show_{name}', table_name='Show')
+    op.execute('ALTER TABLE "Show" RENAME TO "Show_partitioned"')
+    op.execute('ALTER TABLE "Show_partitioned" RENAME CONSTRAINT "Show_pkey" TO "Show_partitioned_pkey"')
+    op.execute('ALTER SEQUENCE "Show_id_seq" OWNED BY NONE')
+    op.execute(
+        'CREATE TABLE "Show" ('
+        'id integer NOT NULL DEFAULT nextval(\'"Show_id_seq"\'::regclass), '
+        'start_time timestamp with time zone, '
+        'artist_id integer NOT NULL REFERENCES "Artist" (id), '
+        'venue_id integer NOT NULL REFERENCES "Venue" (id), '
+        'CONSTRAINT "Show_pkey" PRIMARY KEY (id))'
+    )
+    op.execute(
+        'INSERT INTO "Show" (id, start_time, artist_id, venue_id) '
+        'SELECT id, start_time, artist_id, venue_id FROM "Show_partitioned"'
+    )
+    # dropping the parent drops every partition.
+    op.drop_table('Show_partitioned')
+    op.execute('ALTER SEQUENCE "Show_id_seq" OWNED BY "Show".id')
+    for name, columns in INDEXES:
+        op.create_index(f'ix_Show_{name}', 'Show', columns, unique=False)
+
+
+# ----------------------------------------------------------------------------#
+# SQLite: Show keeps the upcoming (hot) rows and shows that have started move
+# to Show_archive. Show becomes AUTOINCREMENT so archived ids are never
+# reissued.
+# ----------------------------------------------------------------------------#
+
+COLUMNS = 'id, start_time, artist_id, venue_id'
+
+
+def upgrade_sqlite():
+    with op.batch_alter_table('Show', schema=None, recreate='always', table_kwargs={'sqlite_autoincrement': True}) as batch_op:
+        batch_op.alter_column('start_time', existing_type=sa.DateTime(timezone=True), nullable=False)
+
+    op.create_table('Show_archive',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('start_time', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('artist_id', sa.Integer(), nullable=False),
+    sa.Column('venue_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['artist_id'], ['Artist.id'], ),
+    sa.ForeignKeyConstraint(['venue_id'], ['Venue.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    for name, columns in INDEXES:
+        op.create_index(f'ix_Show_archive_{name}', 'Show_archive', columns, unique=False)
+
+    now = sa.bindparam('now', datetime.now(timezone.utc), type_=sa.DateTime(timezone=True))
+    op.execute(
+        sa.text(f'INSERT INTO "Show_archive" ({COLUMNS}) SELECT {COLUMNS} FROM "Show" WHERE start_time <= :now').bindparams(now)
+    )
+    op.execute(sa.text('DELETE FROM "Show" WHERE start_time <= :now').bindparams(now))
+
+
+def downgrade_sqlite():
+    op.execute(f'INSERT INTO "Show" ({COLUMNS}) SELECT {COLUMNS} FROM "Show_archive"')
+    for name, _ in INDEXES:
+        op.drop_index(f'ix_Show_archive_{name}', table_name='Show_archive')
+    op.drop_table('Show_archive')
+    with op.batch_alter_table('Show', schema=None, recreate='always', table_kwargs={'sqlite_autoincrement': False}) as batch_op:
+        batch_op.alter_column('start_time', existing_type=sa.DateTime(timezone=True), nullable=True)
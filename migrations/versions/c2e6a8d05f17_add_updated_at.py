@@ -0,0 +1,53 @@
+"""add updated_at to Venue, Artist and Show
+
+Revision ID: c2e6a8d05f17
+Revises: b4d81f0c6e39
+Create Date: 2026-10-18 16:31:12.660480
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from fts import fts_triggers
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2e6a8d05f17'
+down_revision = 'b4d81f0c6e39'
+branch_labels = None
+depends_on = None
+
+
+def recreate_fts_triggers(name):
+    # sqlite batch mode rebuilds the table, which drops its triggers.
+    for statement in fts_triggers(name):
+        op.execute(statement)
+
+
+def tables(bind):
+    # Show_archive only exists on sqlite (see the partition_shows migration).
+    names = ['Venue', 'Artist', 'Show']
+    if bind.dialect.name == 'sqlite':
+        names.append('Show_archive')
+    return names
+
+
+def upgrade():
+    bind = op.get_bind()
+    # sqlite can't ALTER TABLE ADD COLUMN with a CURRENT_TIMESTAMP default, so
+    # batch mode rebuilds those tables.
+    recreate = 'always' if bind.dialect.name == 'sqlite' else 'auto'
+    for name in tables(bind):
+        with op.batch_alter_table(name, schema=None, recreate=recreate, table_kwargs={'sqlite_autoincrement': name == 'Show'}) as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False))
+        if bind.dialect.name == 'sqlite' and name in ('Venue', 'Artist'):
+            recreate_fts_triggers(name)
+
+
+def downgrade():
+    bind = op.get_bind()
+    for name in reversed(tables(bind)):
+        with op.batch_alter_table(name, schema=None, table_kwargs={'sqlite_autoincrement': name == 'Show'}) as batch_op:
+            batch_op.drop_column('updated_at')
+        if bind.dialect.name == 'sqlite' and name in ('Venue', 'Artist'):
+            recreate_fts_triggers(name)
@@ -0,0 +1,63 @@
+"""cascade deletes from Venue and Artist to Show
+
+Revision ID: d5a19c7e2b48
+Revises: c2e6a8d05f17
+Create Date: 2026-10-18 17:48:20.915733
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a19c7e2b48'
+down_revision = 'c2e6a8d05f17'
+branch_labels = None
+depends_on = None
+
+
+# (Show fk column, referenced table)
+FKS = (
+    ('artist_id', 'Artist'),
+    ('venue_id', 'Venue'),
+)
+
+
+def show_table(name, ondelete):
+    # sqlite can't alter a foreign key, so batch mode copies the table into
+    # this definition (indexes included, Show keeps AUTOINCREMENT).
+    return sa.Table(name, sa.MetaData(),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('start_time', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('artist_id', sa.Integer(), nullable=False),
+    sa.Column('venue_id', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+    sa.ForeignKeyConstraint(['artist_id'], ['Artist.id'], ondelete=ondelete),
+    sa.ForeignKeyConstraint(['venue_id'], ['Venue.id'], ondelete=ondelete),
+    sa.PrimaryKeyConstraint('id'),
+    sa.Index(f'ix_{name}_venue_id_start_time', 'venue_id', 'start_time'),
+    sa.Index(f'ix_{name}_artist_id_start_time', 'artist_id', 'start_time'),
+    sa.Index(f'ix_{name}_start_time', 'start_time'),
+    sqlite_autoincrement=name == 'Show',
+    )
+
+
+def set_ondelete(ondelete):
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        for name in ('Show', 'Show_archive'):
+            with op.batch_alter_table(name, copy_from=show_table(name, ondelete), recreate='always'):
+                pass
+        return
+    for column, referenced in FKS:
+        constraint = f'Show_{column}_fkey'
+        op.drop_constraint(constraint, 'Show', type_='foreignkey')
+        op.create_foreign_key(constraint, 'Show', referenced, [column], ['id'], ondelete=ondelete)
+
+
+def upgrade():
+    set_ondelete('CASCADE')
+
+
+def downgrade():
+    set_ondelete(None)
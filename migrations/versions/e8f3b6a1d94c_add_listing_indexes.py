@@ -0,0 +1,29 @@
+"""add keyset indexes for the artist and venue listings
+
+Revision ID: e8f3b6a1d94c
+Revises: d5a19c7e2b48
+Create Date: 2026-10-18 18:32:47.506118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8f3b6a1d94c'
+down_revision = 'd5a19c7e2b48'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_Artist_name_id', 'Artist', ['name', 'id'], unique=False)
+    # the wider index also serves the (city, state) prefix the old one covered.
+    op.create_index('ix_Venue_city_state_name_id', 'Venue', ['city', 'state', 'name', 'id'], unique=False)
+    op.drop_index('ix_Venue_city_state', table_name='Venue')
+
+
+def downgrade():
+    op.create_index('ix_Venue_city_state', 'Venue', ['city', 'state'], unique=False)
+    op.drop_index('ix_Venue_city_state_name_id', table_name='Venue')
+    op.drop_index('ix_Artist_name_id', table_name='Artist')
@@ -0,0 +1,77 @@
+"""add Show.end_time and exclusion constraints against overlapping shows on postgres
+
+Once Show is partitioned by month (b4d81f0c6e39) each partition carries its
+own constraints, which only compare shows starting in the same month; the
+advisory-locked checks in booking.find_conflicts() are what refuse overlaps
+across partitions.
+
+Revision ID: f1c7d3a92e05
+Revises: e8f3b6a1d94c
+Create Date: 2026-10-18 19:12:05.283946
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1c7d3a92e05'
+down_revision = 'e8f3b6a1d94c'
+branch_labels = None
+depends_on = None
+
+
+# existing shows get the default length (SHOW_DEFAULT_MINUTES).
+DEFAULT_MINUTES = 180
+
+
+def tables(bind):
+    # Show_archive only exists on sqlite (see the partition_shows migration).
+    names = ['Show']
+    if bind.dialect.name == 'sqlite':
+        names.append('Show_archive')
+    return names
+
+
+def show_tables(bind):
+    # a partitioned Show can't carry exclusion constraints, its partitions can.
+    partitions = bind.execute(sa.text(
+        'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+        'WHERE i.inhparent = \'"Show"\'::regclass ORDER BY c.relname'
+    )).scalars().all()
+    return partitions or ['Show']
+
+
+def upgrade():
+    bind = op.get_bind()
+    for name in tables(bind):
+        with op.batch_alter_table(name, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('end_time', sa.DateTime(timezone=True), nullable=True))
+        if bind.dialect.name == 'sqlite':
+            # keep sqlalchemy's 'YYYY-MM-DD HH:MM:SS.ffffff' storage format.
+            op.execute(
+                f'UPDATE "{name}" SET end_time = '
+                f"strftime('%Y-%m-%d %H:%M:%S', start_time, '+{DEFAULT_MINUTES} minutes') || substr(start_time, 20)"
+            )
+        else:
+            op.execute(f'UPDATE "{name}" SET end_time = start_time + interval \'{DEFAULT_MINUTES} minutes\'')
+        with op.batch_alter_table(name, schema=None, table_kwargs={'sqlite_autoincrement': name == 'Show'}) as batch_op:
+            batch_op.alter_column('end_time', existing_type=sa.DateTime(timezone=True), nullable=False)
+
+    if bind.dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+        # fails, naming the clashing shows, if any already overlap.
+        for table in show_tables(bind):
+            for fk in ('venue_id', 'artist_id'):
+                op.execute(
+                    f'ALTER TABLE "{table}" ADD CONSTRAINT "{table}_{fk}_excl" '
+                    f'EXCLUDE USING gist ({fk} WITH =, tstzrange(start_time, end_time) WITH &&)'
+                )
+
+
+def downgrade():
+    bind = op.get_bind()
+    # dropping the column drops the exclusion constraints with it.
+    for name in reversed(tables(bind)):
+        with op.batch_alter_table(name, schema=None, table_kwargs={'sqlite_autoincrement': name == 'Show'}) as batch_op:
+            batch_op.drop_column('end_time')
@@ -1,46 +1,302 @@
-from webbrowser import BackgroundBrowser
-from app import db
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from sqlalchemy import DDL, event
+from extensions import db
+from fts import fts_table, fts_triggers
+
+
+def utcnow():
+    return datetime.now(timezone.utc)
+
+
+def as_utc(value):
+    # sqlite returns naive datetimes; they are stored as UTC. Aware values
+    # are converted, since sqlite would store their wall time as UTC.
+    if value.tzinfo:
+        return value.astimezone(timezone.utc)
+    return value.replace(tzinfo=timezone.utc)
+
+
+venue_genres = db.Table(
+    "VenueGenre",
+    db.Column(
+        "venue_id",
+        db.Integer,
+        db.ForeignKey("Venue.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    db.Column(
+        "genre_id",
+        db.Integer,
+        db.ForeignKey("Genre.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    # genre -> venues lookups for /venues?genre=
+    db.Index("ix_VenueGenre_genre_id", "genre_id", "venue_id"),
+    extend_existing=True,
+)
+
+artist_genres = db.Table(
+    "ArtistGenre",
+    db.Column(
+        "artist_id",
+        db.Integer,
+        db.ForeignKey("Artist.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    db.Column(
+        "genre_id",
+        db.Integer,
+        db.ForeignKey("Genre.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    # genre -> artists lookups for /artists?genre=
+    db.Index("ix_ArtistGenre_genre_id", "genre_id", "artist_id"),
+    extend_existing=True,
+)
+
+
+class Genre(db.Model):
+    __tablename__ = "Genre"
+    __table_args__ = {"extend_existing": True}
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(120), nullable=False, unique=True)
+
+    @staticmethod
+    def clean(names):
+        # stripped, non-empty and de-duplicated, in order.
+        return list(dict.fromkeys(n.strip() for n in names if n and n.strip()))
+
+    @classmethod
+    def resolve(cls, names):
+        # Genre rows for the given names, creating the missing ones.
+        names = cls.clean(names)
+        if not names:
+            return []
+        existing = {g.name: g for g in cls.query.filter(cls.name.in_(names))}
+        for name in names:
+            if name not in existing:
+                existing[name] = cls(name=name)
+                db.session.add(existing[name])
+        return [existing[name] for name in names]
 
 
 class Venue(db.Model):
     __tablename__ = "Venue"
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        # /venues groups, orders and pages by area, then name.
+        db.Index("ix_Venue_city_state_name_id", "city", "state", "name", "id"),
+        {"extend_existing": True},
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(500))
     city = db.Column(db.String(500))
     state = db.Column(db.String(500))
     address = db.Column(db.String(500))
     phone = db.Column(db.String(500))
-    genres = db.Column(db.String(500))
+    genres = db.relationship(
+        "Genre", secondary=venue_genres, lazy="selectin", order_by="Genre.name"
+    )
     image_link = db.Column(db.String(500))
     website = db.Column(db.String(500))
     facebook_link = db.Column(db.String(200))
     seeking_talent = db.Column(db.Boolean, default=False)
     seeking_description = db.Column(db.String(500))
-    shows = db.relationship("Show", backref="venue", lazy="dynamic")
+    # maintained by counters.py; see `flask fyyur rollover`.
+    upcoming_shows_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+    past_shows_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+    # bumped by every write to the row; validates conditional GETs.
+    updated_at = db.Column(
+        db.DateTime(timezone=True),
+        nullable=False,
+        default=utcnow,
+        onupdate=utcnow,
+        server_default=db.func.now(),
+    )
+    shows = db.relationship(
+        "Show", backref="venue", lazy="dynamic", passive_deletes=True
+    )
 
 
 class Artist(db.Model):
     __tablename__ = "Artist"
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        # /artists orders and pages by name.
+        db.Index("ix_Artist_name_id", "name", "id"),
+        {"extend_existing": True},
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String)
     city = db.Column(db.String(120))
     state = db.Column(db.String(120))
     phone = db.Column(db.String(120))
-    genres = db.Column(db.String(120))
+    genres = db.relationship(
+        "Genre", secondary=artist_genres, lazy="selectin", order_by="Genre.name"
+    )
     image_link = db.Column(db.String(500))
     facebook_link = db.Column(db.String(120))
     seeking_venue = db.Column(db.Boolean, default=False)
     seeking_description = db.Column(db.String(), nullable=True)
     website = db.Column(db.String(120), nullable=True)
-    shows = db.relationship("Show", backref="artist", lazy="dynamic")
+    # maintained by counters.py; see `flask fyyur rollover`.
+    upcoming_shows_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+    past_shows_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+    # bumped by every write to the row; validates conditional GETs.
+    updated_at = db.Column(
+        db.DateTime(timezone=True),
+        nullable=False,
+        default=utcnow,
+        onupdate=utcnow,
+        server_default=db.func.now(),
+    )
+    shows = db.relationship(
+        "Show", backref="artist", lazy="dynamic", passive_deletes=True
+    )
+
+
+def default_end_time(context):
+    # shows booked without an end run SHOW_DEFAULT_MINUTES.
+    minutes = current_app.config["SHOW_DEFAULT_MINUTES"]
+    return context.get_current_parameters()["start_time"] + timedelta(minutes=minutes)
 
 
 class Show(db.Model):
     __tablename__ = "Show"
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        # detail pages and per-venue/artist counts filter on the fk plus time;
+        # /shows orders by time.
+        db.Index("ix_Show_venue_id_start_time", "venue_id", "start_time"),
+        db.Index("ix_Show_artist_id_start_time", "artist_id", "start_time"),
+        db.Index("ix_Show_start_time", "start_time"),
+        # ids of archived shows (see partitions.py) must never be reissued.
+        {"extend_existing": True, "sqlite_autoincrement": True},
+    )
+    # On Postgres the partitioned table's primary key is (id, start_time) (see
+    # migration b4d81f0c6e39), since it must include the partition key. The
+    # model keeps id alone on purpose. SQLite's Show isn't partitioned and
+    # needs id as its INTEGER PRIMARY KEY AUTOINCREMENT for the archive, and
+    # ids come from one sequence on Postgres, so id alone still identifies a
+    # show for the ORM. Autogenerate doesn't compare primary keys, so it
+    # won't try to reconcile the two; schema changes to Show are written by
+    # hand.
     id = db.Column(db.Integer, primary_key=True)
-    start_time = db.Column(db.DateTime(timezone=True))
-    artist_id = db.Column(db.Integer, db.ForeignKey("Artist.id"), nullable=False)
-    venue_id = db.Column(db.Integer, db.ForeignKey("Venue.id"), nullable=False)
+    start_time = db.Column(db.DateTime(timezone=True), nullable=False)
+    # see booking.py for how overlapping shows are refused.
+    end_time = db.Column(
+        db.DateTime(timezone=True), nullable=False, default=default_end_time
+    )
+    artist_id = db.Column(
+        db.Integer, db.ForeignKey("Artist.id", ondelete="CASCADE"), nullable=False
+    )
+    venue_id = db.Column(
+        db.Integer, db.ForeignKey("Venue.id", ondelete="CASCADE"), nullable=False
+    )
+    updated_at = db.Column(
+        db.DateTime(timezone=True),
+        nullable=False,
+        default=utcnow,
+        onupdate=utcnow,
+        server_default=db.func.now(),
+    )
+
+
+# ----------------------------------------------------------------------------#
+# Name search indexes: pg_trgm GIN on Postgres, FTS5 shadow table on SQLite.
+# ----------------------------------------------------------------------------#
+
+
+def search_index_ddl(tablename):
+    return {
+        "postgresql": [
+            "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+            f'CREATE INDEX "ix_{tablename}_name_trgm" '
+            f'ON "{tablename}" USING gin (name gin_trgm_ops)',
+        ],
+        "sqlite": [fts_table(tablename), *fts_triggers(tablename)],
+    }
+
+
+# ----------------------------------------------------------------------------#
+# SQLite archive of started shows; Postgres partitions Show instead (see the
+# partition_shows migration and partitions.py).
+# ----------------------------------------------------------------------------#
+
+SHOW_ARCHIVE_DDL = [
+    'CREATE TABLE "Show_archive" ('
+    "id INTEGER NOT NULL PRIMARY KEY, "
+    "start_time DATETIME NOT NULL, "
+    "end_time DATETIME NOT NULL, "
+    'artist_id INTEGER NOT NULL REFERENCES "Artist" (id) ON DELETE CASCADE, '
+    'venue_id INTEGER NOT NULL REFERENCES "Venue" (id) ON DELETE CASCADE, '
+    "updated_at DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL)",
+    'CREATE INDEX "ix_Show_archive_venue_id_start_time" '
+    'ON "Show_archive" (venue_id, start_time)',
+    'CREATE INDEX "ix_Show_archive_artist_id_start_time" '
+    'ON "Show_archive" (artist_id, start_time)',
+    'CREATE INDEX "ix_Show_archive_start_time" ON "Show_archive" (start_time)',
+]
+
+for _statement in SHOW_ARCHIVE_DDL:
+    event.listen(
+        Show.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite")
+    )
+event.listen(
+    Show.__table__,
+    "before_drop",
+    DDL('DROP TABLE IF EXISTS "Show_archive"').execute_if(dialect="sqlite"),
+)
+
+for _model in (Venue, Artist):
+    for _dialect, _statements in search_index_ddl(_model.__tablename__).items():
+        for _statement in _statements:
+            event.listen(
+                _model.__table__,
+                "after_create",
+                DDL(_statement).execute_if(dialect=_dialect),
+            )
+    event.listen(
+        _model.__table__,
+        "before_drop",
+        DDL(f'DROP TABLE IF EXISTS "{_model.__tablename__}_fts"').execute_if(
+            dialect="sqlite"
+        ),
+    )
+
+
+# ----------------------------------------------------------------------------#
+# Postgres exclusion constraints against overlapping shows at a venue or by
+# an artist. A partitioned Show can't carry them itself, so each monthly
+# partition gets its own (partitions.py adds them to new partitions), and
+# they only compare shows within one partition: two shows overlapping across
+# a month boundary pass them. booking.find_conflicts(), run under advisory
+# locks, is what refuses those.
+# ----------------------------------------------------------------------------#
+
+
+def show_exclusion_ddl(tablename):
+    return [
+        f'ALTER TABLE "{tablename}" ADD CONSTRAINT "{tablename}_{fk}_excl" '
+        f"EXCLUDE USING gist ({fk} WITH =, tstzrange(start_time, end_time) WITH &&)"
+        for fk in ("venue_id", "artist_id")
+    ]
+
+
+SHOW_EXCLUSION_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS btree_gist",
+    *show_exclusion_ddl("Show"),
+]
+
+for _statement in SHOW_EXCLUSION_DDL:
+    event.listen(
+        Show.__table__,
+        "after_create",
+        DDL(_statement).execute_if(dialect="postgresql"),
+    )
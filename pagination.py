@@ -0,0 +1,92 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+
+from sqlalchemy import and_, false, or_
+
+
+# ----------------------------------------------------------------------------#
+# Keyset (cursor) pagination helpers.
+# ----------------------------------------------------------------------------#
+
+
+def page_size(requested, default, maximum):
+    # clamp a client supplied page size into [1, maximum].
+    if requested is None or requested < 1:
+        return default
+    return min(requested, maximum)
+
+
+def encode_cursor(*values):
+    # opaque, url safe token holding the sort key of the last row of a page.
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, *types):
+    # inverse of encode_cursor; raises ValueError on anything malformed.
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(urlsafe_b64decode(padded.encode()))
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"invalid cursor: {cursor!r}") from e
+    if not isinstance(payload, list) or len(payload) != len(types):
+        raise ValueError(f"invalid cursor: {cursor!r}")
+    values = []
+    for t, value in zip(types, payload):
+        if value is None:
+            values.append(None)
+        elif t is datetime:
+            values.append(datetime.fromisoformat(value))
+        else:
+            values.append(t(value))
+    return values
+
+
+def keyset_page(query, columns, cursor, types, limit, descending=False):
+    # the page of `query` (already ordered by columns) after `cursor`, and the
+    # cursor of the next page, or None on the last one. One extra row tells
+    # whether there is a next page. Raises ValueError on a bad cursor.
+    if cursor:
+        after = decode_cursor(cursor, *types)
+        query = query.filter(
+            keyset_filter(columns, after, descending, nulls_largest(query))
+        )
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*(getattr(rows[-1], c.key) for c in columns))
+
+
+def nulls_largest(query):
+    # where the database sorts NULLs: after every value on Postgres, before
+    # them on SQLite and MySQL.
+    return query.session.get_bind().dialect.name in ("postgresql", "oracle")
+
+
+def keyset_filter(columns, values, descending=False, nulls_largest=False):
+    # rows strictly after `values` in (columns...) order, i.e.
+    # c1 > v1 OR (c1 = v1 AND c2 > v2) OR ... (< when descending). Sort
+    # keys may be NULL (a nameless artist), so NULL compares with IS and
+    # NULLs come before or after the values as the database sorts them.
+    nulls_after = nulls_largest != descending
+    clauses = []
+    for i, (column, value) in enumerate(zip(columns, values)):
+        if value is None:
+            after = column.isnot(None) if not nulls_after else false()
+        else:
+            after = column < value if descending else column > value
+            if nulls_after and nullable(column):
+                after = or_(after, column.is_(None))
+        equal = [same(c, v) for c, v in zip(columns[:i], values[:i])]
+        clauses.append(and_(*equal, after))
+    return or_(*clauses)
+
+
+def same(column, value):
+    return column.is_(None) if value is None else column == value
+
+
+def nullable(column):
+    return getattr(getattr(column, "expression", column), "nullable", True)
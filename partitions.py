@@ -0,0 +1,139 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import column, delete, select, table, text, union_all
+from sqlalchemy.orm import aliased
+
+from extensions import db
+from models import Show, show_exclusion_ddl
+
+# ----------------------------------------------------------------------------#
+# Show storage.
+#
+# Every Show query filters on start_time. On Postgres "Show" is range
+# partitioned by month (see the partition_shows migration), so a
+# start_time > now predicate prunes to the current and future partitions.
+# SQLite cannot partition; there "Show" holds the hot rows and shows that have
+# started are moved to "Show_archive". `flask fyyur rotate-shows` creates the
+# coming months' partitions or moves started shows to the archive.
+# ----------------------------------------------------------------------------#
+
+show_archive = table(
+    "Show_archive",
+    column("id", Show.id.type),
+    column("start_time", Show.start_time.type),
+    column("end_time", Show.end_time.type),
+    column("artist_id", Show.artist_id.type),
+    column("venue_id", Show.venue_id.type),
+    column("updated_at", Show.updated_at.type),
+)
+
+COLUMNS = ("id", "start_time", "end_time", "artist_id", "venue_id", "updated_at")
+
+
+def has_archive():
+    return db.engine.dialect.name == "sqlite"
+
+
+def show_source(past=True):
+    # what to query Show through: Show itself, or, when past shows are wanted
+    # on SQLite, Show plus its archive. Use the result like Show
+    # (source.start_time, source.venue_id, ...).
+    if not past or not has_archive():
+        return Show
+    rows = union_all(
+        select(*(getattr(Show, c) for c in COLUMNS)),
+        select(*(show_archive.c[c] for c in COLUMNS)),
+    ).subquery("all_shows")
+    return aliased(Show, rows)
+
+
+def upcoming(source, now=None):
+    return source.start_time > (now or datetime.now(timezone.utc))
+
+
+# ----------------------------------------------------------------------------#
+# Rotation.
+# ----------------------------------------------------------------------------#
+
+
+def month_start(moment):
+    return datetime(moment.year, moment.month, 1, tzinfo=timezone.utc)
+
+
+def next_month(month):
+    return month.replace(
+        year=month.year + month.month // 12, month=month.month % 12 + 1
+    )
+
+
+def partition_name(month):
+    return f"Show_{month:%Y_%m}"
+
+
+def is_partitioned():
+    return (
+        db.engine.dialect.name == "postgresql"
+        and db.session.execute(
+            text("SELECT relkind FROM pg_class WHERE oid = to_regclass('\"Show\"')")
+        ).scalar()
+        == "p"
+    )
+
+
+def create_partitions(now, months_ahead):
+    # monthly partitions, with their exclusion constraints, through now +
+    # months_ahead. Rows already sitting in the default partition for a new
+    # month's range are moved into it.
+    created = []
+    months = [month_start(now)]
+    while len(months) <= months_ahead:
+        months.append(next_month(months[-1]))
+    for month in months:
+        name = partition_name(month)
+        exists = db.session.execute(
+            text("SELECT to_regclass(:name)"), {"name": f'"{name}"'}
+        ).scalar()
+        if exists:
+            continue
+        bounds = {"lo": month, "hi": next_month(month)}
+        db.session.execute(text('CREATE TEMP TABLE show_moving (LIKE "Show")'))
+        db.session.execute(
+            text(
+                'WITH moved AS (DELETE FROM "Show_default" '
+                "WHERE start_time >= :lo AND start_time < :hi RETURNING *) "
+                "INSERT INTO show_moving SELECT * FROM moved"
+            ),
+            bounds,
+        )
+        db.session.execute(
+            text(
+                f'CREATE TABLE "{name}" PARTITION OF "Show" FOR VALUES '
+                f"FROM ('{bounds['lo'].isoformat()}') TO ('{bounds['hi'].isoformat()}')"
+            )
+        )
+        for statement in show_exclusion_ddl(name):
+            db.session.execute(text(statement))
+        db.session.execute(text('INSERT INTO "Show" SELECT * FROM show_moving'))
+        db.session.execute(text("DROP TABLE show_moving"))
+        created.append(name)
+    return created
+
+
+def archive_started(now):
+    # move shows that have started from Show to Show_archive; ids are kept
+    # (Show is AUTOINCREMENT, so they are never reissued).
+    started = select(*(getattr(Show, c) for c in COLUMNS)).where(Show.start_time <= now)
+    db.session.execute(show_archive.insert().from_select(COLUMNS, started))
+    return db.session.execute(
+        delete(Show.__table__).where(Show.start_time <= now)
+    ).rowcount
+
+
+def rotate(now=None, months_ahead=3):
+    # (partitions created, shows archived)
+    now = now or datetime.now(timezone.utc)
+    if has_archive():
+        return [], archive_started(now)
+    if is_partitioned():
+        return create_partitions(now, months_ahead), 0
+    return [], 0
@@ -0,0 +1,62 @@
+from calendar import monthrange
+from datetime import date, datetime, timedelta
+
+from models import as_utc
+
+# ----------------------------------------------------------------------------#
+# Recurring shows.
+#
+# A booking is a start time plus an optional rule: weekly or monthly, ending
+# after `count` occurrences or on `until`. expand() turns it into start
+# times; booking.py checks and inserts them.
+# ----------------------------------------------------------------------------#
+
+FREQUENCIES = ("weekly", "monthly")
+
+
+def add_months(start, months):
+    # the same day of month, or the month's last day when it is shorter
+    # (a residency on the 31st plays on the 30th in April).
+    index = start.month - 1 + months
+    year, month = start.year + index // 12, index % 12 + 1
+    return start.replace(
+        year=year, month=month, day=min(start.day, monthrange(year, month)[1])
+    )
+
+
+def occurrence(start, frequency, n):
+    if frequency == "weekly":
+        return start + timedelta(weeks=n)
+    return add_months(start, n)
+
+
+def expand(start, frequency=None, count=None, until=None, maximum=104):
+    # the start times of a booking; raises ValueError on a bad rule.
+    if not frequency:
+        return [start]
+    if frequency not in FREQUENCIES:
+        raise ValueError(f"unknown recurrence: {frequency!r}")
+    if count is None and until is None:
+        raise ValueError("a recurring show needs a count or an until date")
+    if count is not None and count < 1:
+        raise ValueError("count must be at least 1")
+
+    # an until date includes shows on that day.
+    if isinstance(until, datetime):
+        ends = lambda when: as_utc(when) > as_utc(until)
+    elif isinstance(until, date):
+        ends = lambda when: when.date() > until
+    else:
+        ends = lambda when: False
+
+    times = []
+    while count is None or len(times) < count:
+        when = occurrence(start, frequency, len(times))
+        if ends(when):
+            break
+        if len(times) == maximum:
+            raise ValueError(f"a booking can have at most {maximum} shows")
+        times.append(when)
+    if not times:
+        raise ValueError("until is before the first show")
+    return times
@@ -0,0 +1,74 @@
+import time
+
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy import SignallingSession, SQLAlchemy
+from sqlalchemy import orm
+from sqlalchemy.sql.dml import UpdateBase
+
+REPLICA_BIND = "replica"
+
+
+# ----------------------------------------------------------------------------#
+# Read-replica routing.
+#
+# With a "replica" entry in SQLALCHEMY_BINDS, reads made while serving a GET
+# (or a POST view marked @replica_ok, like the searches) go to the replica.
+# Everything else goes to the primary: other POSTs, flushes and DML, every
+# statement after a write in the same request, and every request from a
+# client that wrote within the last REPLICA_READ_YOUR_WRITES_SECONDS, so a
+# create/edit redirect always shows the new data.
+#
+# Locally, point DATABASE_URL and REPLICA_DATABASE_URL at two SQLite files
+# (or two Postgres databases) that hold the same schema.
+# ----------------------------------------------------------------------------#
+
+
+def replica_ok(view):
+    # allow a non-GET view that only reads (e.g. a search POST) on the replica.
+    view.replica_ok = True
+    return view
+
+
+class RoutingSession(SignallingSession):
+    def __init__(self, db, **options):
+        self.db = db
+        super().__init__(db, **options)
+
+    def get_bind(self, mapper=None, clause=None):
+        if self._flushing or isinstance(clause, UpdateBase):
+            if has_request_context():
+                g.db_wrote = True
+        elif has_request_context() and g.get("db_replica") and not g.get("db_wrote"):
+            return self.db.get_engine(self.app, bind=REPLICA_BIND)
+        return super().get_bind(mapper, clause)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+    def init_app(self, app):
+        super().init_app(app)
+        app.config.setdefault("REPLICA_READ_YOUR_WRITES_SECONDS", 5)
+        app.before_request(route_request)
+        app.after_request(remember_write)
+
+
+def route_request():
+    if REPLICA_BIND not in (current_app.config.get("SQLALCHEMY_BINDS") or {}):
+        return
+    view = current_app.view_functions.get(request.endpoint)
+    reads_only = request.method in ("GET", "HEAD") or getattr(view, "replica_ok", False)
+    # the response cache also skips lookups for these clients, since a page
+    # cached from the replica may predate their write.
+    g.db_read_your_writes = session.get("_db_wrote_until", 0) > time.time()
+    g.db_replica = reads_only and not g.db_read_your_writes
+
+
+def remember_write(response):
+    # open the read-your-writes window for this client.
+    if g.get("db_wrote"):
+        session["_db_wrote_until"] = (
+            time.time() + current_app.config["REPLICA_READ_YOUR_WRITES_SECONDS"]
+        )
+    return response
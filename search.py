@@ -0,0 +1,69 @@
+import re
+
+from sqlalchemy import column, desc, func, table
+
+from extensions import db
+from models import Artist, Venue
+
+
+# ----------------------------------------------------------------------------#
+# Name search.
+#
+# Postgres matches with ILIKE served by a pg_trgm GIN index and ranks by
+# trigram similarity; SQLite matches prefix tokens against an FTS5 table kept
+# in sync by triggers and ranks by bm25. The DDL lives in models.py, with the
+# FTS5 table and triggers in fts.py.
+#
+# The two don't match the same names. Postgres keeps the original substring
+# semantics ("band" finds "Sunband"). SQLite matches word prefixes: "band"
+# finds "Band of Horses" and "Bandits" but not "Sunband", since FTS5 can't
+# serve infix matches from its index.
+# ----------------------------------------------------------------------------#
+
+
+def escape_like(term):
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def fts_query(term):
+    # every word of the term must prefix-match a word of the name.
+    return " ".join(f'"{token}"*' for token in re.findall(r"\w+", term))
+
+
+def search(model, term, limit, offset=0):
+    # ranked page of (id, name, num_upcoming_shows) plus the total hit count.
+    term = (term or "").strip()
+    query = db.session.query(
+        model.id,
+        model.name,
+        model.upcoming_shows_count.label("num_upcoming_shows"),
+        func.count().over().label("total"),
+    )
+
+    dialect = db.engine.dialect.name
+    if term and dialect == "sqlite" and fts_query(term):
+        fts = table(f"{model.__tablename__}_fts", column("rowid"), column("rank"))
+        query = (
+            query.join(fts, fts.c.rowid == model.id)
+            .filter(column(fts.name).match(fts_query(term)))
+            .order_by(fts.c.rank, model.name)
+        )
+    elif term:
+        query = query.filter(model.name.ilike(f"%{escape_like(term)}%", escape="\\"))
+        if dialect == "postgresql":
+            query = query.order_by(desc(func.similarity(model.name, term)))
+        query = query.order_by(model.name)
+    else:
+        query = query.order_by(model.name)
+
+    rows = query.limit(limit).offset(offset).all()
+    total = rows[0].total if rows else 0
+    return total, rows
+
+
+def search_venues(term, limit, offset=0):
+    return search(Venue, term, limit, offset)
+
+
+def search_artists(term, limit, offset=0):
+    return search(Artist, term, limit, offset)
@@ -0,0 +1,183 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func
+
+import booking
+import counters
+import partitions
+from extensions import db
+from forms import VenueForm
+from models import Artist, Genre, Show, Venue, artist_genres, venue_genres
+
+# ----------------------------------------------------------------------------#
+# Synthetic data for local load testing and benchmarks.
+# ----------------------------------------------------------------------------#
+
+CITIES = [
+    ("San Francisco", "CA"),
+    ("Los Angeles", "CA"),
+    ("New York", "NY"),
+    ("Brooklyn", "NY"),
+    ("Austin", "TX"),
+    ("Houston", "TX"),
+    ("Chicago", "IL"),
+    ("Seattle", "WA"),
+    ("Portland", "OR"),
+    ("Nashville", "TN"),
+    ("New Orleans", "LA"),
+    ("Denver", "CO"),
+    ("Atlanta", "GA"),
+    ("Boston", "MA"),
+    ("Miami", "FL"),
+    ("Detroit", "MI"),
+]
+GENRES = [name for name, _ in VenueForm.genres.kwargs["choices"]]
+VENUE_WORDS = (
+    ["The", "Blue", "Red", "Golden", "Velvet", "Electric", "Old", "Little", "Grand"],
+    [
+        "Note",
+        "Room",
+        "Hall",
+        "Tavern",
+        "Lounge",
+        "Garage",
+        "Theatre",
+        "Ballroom",
+        "Cellar",
+    ],
+)
+ARTIST_WORDS = (
+    ["Midnight", "Silver", "Wild", "Lonesome", "Crimson", "Hollow", "Neon", "Paper"],
+    ["Owls", "Horses", "Kings", "Rivers", "Ghosts", "Machines", "Saints", "Lights"],
+)
+BATCH_SIZE = 10000
+
+
+def insert_batched(table, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            db.session.execute(table.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(table.insert(), batch)
+
+
+def name(rng, words, n):
+    first, second = words
+    return f"{rng.choice(first)} {rng.choice(second)} {n}"
+
+
+def entity_row(rng, n, words, seeking_field):
+    city, state = rng.choice(CITIES)
+    return {
+        "name": name(rng, words, n),
+        "city": city,
+        "state": state,
+        "phone": f"{rng.randint(200, 999)}-{rng.randint(200, 999)}-{rng.randint(1000, 9999)}",
+        "image_link": f"https://picsum.photos/seed/{n}/300/300",
+        "facebook_link": f"https://www.facebook.com/fyyur{n}",
+        "website": f"https://example.com/{n}",
+        seeking_field: rng.random() < 0.3,
+        "seeking_description": None,
+    }
+
+
+def insert_entities(rng, model, link, fk, count, words, seeking_field, extra):
+    # insert `count` rows, then link each new id to one to three genres.
+    first_id = db.session.query(func.coalesce(func.max(model.id), 0)).scalar() + 1
+    insert_batched(
+        model.__table__,
+        (
+            {**entity_row(rng, n, words, seeking_field), **extra(rng, n)}
+            for n in range(count)
+        ),
+    )
+    ids = [
+        i
+        for i, in db.session.query(model.id)
+        .filter(model.id >= first_id)
+        .order_by(model.id)
+    ]
+    genres = Genre.resolve(GENRES)
+    db.session.flush()
+    genre_ids = {g.name: g.id for g in genres}
+    insert_batched(
+        link,
+        (
+            {fk: entity_id, "genre_id": genre_ids[genre]}
+            for entity_id in ids
+            for genre in rng.sample(GENRES, rng.randint(1, 3))
+        ),
+    )
+    return ids
+
+
+def show_rows(rng, count, venue_ids, artist_ids, start, span_hours):
+    # shows starting on the hour, none overlapping another at its venue or by
+    # its artist: the hours each show covers are marked busy for both.
+    length = booking.default_length()
+    hours = -(-length // timedelta(hours=1))
+    busy = set()
+    for _ in range(count):
+        while True:
+            venue_id, artist_id = rng.choice(venue_ids), rng.choice(artist_ids)
+            hour = rng.randrange(span_hours)
+            slots = [
+                (key, h)
+                for key in (("venue", venue_id), ("artist", artist_id))
+                for h in range(hour, hour + hours)
+            ]
+            if busy.isdisjoint(slots):
+                break
+        busy.update(slots)
+        start_time = start + timedelta(hours=hour)
+        yield {
+            "venue_id": venue_id,
+            "artist_id": artist_id,
+            "start_time": start_time,
+            "end_time": start_time + length,
+        }
+
+
+def seed(shows, venues=None, artists=None, random_seed=42, now=None):
+    # add `shows` shows between `venues` venues and `artists` artists, about
+    # three quarters of them in the past; returns the counts inserted.
+    rng = random.Random(random_seed)
+    venues = venues if venues is not None else max(10, shows // 20)
+    artists = artists if artists is not None else max(10, shows // 10)
+    now = now or datetime.now(timezone.utc)
+
+    venue_ids = insert_entities(
+        rng,
+        Venue,
+        venue_genres,
+        "venue_id",
+        venues,
+        VENUE_WORDS,
+        "seeking_talent",
+        lambda rng, n: {"address": f"{rng.randint(1, 9999)} Main St"},
+    )
+    artist_ids = insert_entities(
+        rng,
+        Artist,
+        artist_genres,
+        "artist_id",
+        artists,
+        ARTIST_WORDS,
+        "seeking_venue",
+        lambda rng, n: {},
+    )
+    # shows start on the hour, from two years back to six months ahead.
+    start = now.replace(minute=0, second=0, microsecond=0) - timedelta(days=730)
+    span_hours = (730 + 182) * 24
+    insert_batched(
+        Show.__table__,
+        show_rows(rng, shows, venue_ids, artist_ids, start, span_hours),
+    )
+    counters.recount_all(now)
+    partitions.rotate(now)
+    db.session.commit()
+    return {"venues": venues, "artists": artists, "shows": shows}
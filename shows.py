@@ -0,0 +1,184 @@
+from datetime import datetime
+
+from flask import (
+    Blueprint,
+    abort,
+    current_app,
+    flash,
+    render_template,
+    request,
+    url_for,
+)
+from sqlalchemy import desc
+from sqlalchemy.exc import IntegrityError
+
+import booking
+import partitions
+import recurrence
+from extensions import cache, db
+from forms import ShowForm
+from models import Artist, Venue
+from pagination import keyset_page, page_size
+from views import forget_booked, format_datetime, record_exists
+
+shows = Blueprint("shows", __name__, url_prefix="/shows")
+
+
+# hot query, checked against its index by indexes.py.
+def show_listing_query(source, past=False):
+    # upcoming shows soonest first, or every show newest first when past is
+    # set; (start_time, id) is the keyset so ties never repeat or skip.
+    # source comes from partitions.show_source(past).
+    query = (
+        db.session.query(
+            source.id,
+            source.start_time,
+            source.venue_id,
+            Venue.name.label("venue_name"),
+            source.artist_id,
+            Artist.name.label("artist_name"),
+            Artist.image_link.label("artist_image_link"),
+        )
+        .join(Artist, Artist.id == source.artist_id)
+        .join(Venue, Venue.id == source.venue_id)
+    )
+    if past:
+        return query.order_by(desc(source.start_time), desc(source.id))
+    return query.filter(partitions.upcoming(source)).order_by(
+        source.start_time, source.id
+    )
+
+
+#  Shows
+#  ----------------------------------------------------------------
+
+
+@shows.route("")
+@cache.cached("shows")
+def index():
+    limit = page_size(
+        request.args.get("limit", type=int),
+        current_app.config["SHOWS_PER_PAGE"],
+        current_app.config["MAX_PAGE_SIZE"],
+    )
+    # upcoming shows by default; ?past=1 pages back through every show.
+    past = request.args.get("past", type=int) == 1
+    source = partitions.show_source(past)
+    query = show_listing_query(source, past)
+    try:
+        rows, next_cursor = keyset_page(
+            query,
+            (source.start_time, source.id),
+            request.args.get("cursor"),
+            (datetime, int),
+            limit,
+            descending=past,
+        )
+    except ValueError:
+        abort(400)
+
+    data = [
+        {
+            "venue_id": show.venue_id,
+            "venue_name": show.venue_name,
+            "artist_id": show.artist_id,
+            "artist_name": show.artist_name,
+            "artist_image_link": show.artist_image_link,
+            "start_time": show.start_time,
+        }
+        for show in rows
+    ]
+
+    return render_template(
+        "pages/shows.html",
+        shows=data,
+        past=past,
+        next_cursor=next_cursor,
+        next_url=next_cursor
+        and url_for(
+            "shows.index",
+            cursor=next_cursor,
+            limit=request.args.get("limit"),
+            past=1 if past else None,
+        ),
+    )
+
+
+@shows.route("/create")
+def create_shows():
+    # renders form. do not touch.
+    form = ShowForm()
+    return render_template("forms/new_show.html", form=form)
+
+
+@shows.route("/create", methods=["POST"])
+def create_show_submission():
+    form = ShowForm(request.form)
+    venue_id = request.form.get("venue_id", type=int)
+    artist_id = request.form.get("artist_id", type=int)
+    if form.start_time.data is None:
+        flash("Please enter a valid start time.")
+        return render_template("forms/new_show.html", form=form), 400
+    if not record_exists(Venue, venue_id):
+        flash("Please pick an existing venue.")
+        return render_template("forms/new_show.html", form=form), 400
+    if not record_exists(Artist, artist_id):
+        flash("Please pick an existing artist.")
+        return render_template("forms/new_show.html", form=form), 400
+    try:
+        length = booking.show_length(form.start_time.data, form.end_time.data)
+        start_times = recurrence.expand(
+            form.start_time.data,
+            form.repeat.data,
+            form.count.data,
+            form.until.data,
+            current_app.config["MAX_OCCURRENCES"],
+        )
+    except ValueError as e:
+        flash(f"Please check the show times: {e}.")
+        return render_template("forms/new_show.html", form=form), 400
+
+    # every occurrence is checked in one query and booked in one insert.
+    shows = booking.bookings(venue_id, artist_id, start_times, length)
+    conflicts = booking.find_conflicts(shows)
+    if conflicts:
+        taken = [format_datetime(show["start_time"]) for show, _ in conflicts]
+        flash(
+            "The venue or the artist is already booked at "
+            + ", ".join(taken[:3])
+            + (" and other times." if len(taken) > 3 else ".")
+        )
+        return render_template("forms/new_show.html", form=form), 409
+
+    error = conflict = missing = False
+    try:
+        booking.book_shows(shows)
+        db.session.commit()
+        forget_booked(venue_id, artist_id)
+    except IntegrityError as e:
+        # Postgres' exclusion constraints caught an overlap booked meanwhile
+        # by a writer that skipped booking.find_conflicts();
+        # anything else is the venue or artist deleted meanwhile.
+        conflict = booking.overlap_violation(e)
+        missing = not conflict
+        db.session.rollback()
+    except:
+        error = True
+        db.session.rollback()
+    finally:
+        db.session.close()
+    if conflict:
+        flash("The venue or the artist was booked meanwhile; please try again.")
+        return render_template("forms/new_show.html", form=form), 409
+    if missing:
+        flash("The venue or the artist no longer exists.")
+        return render_template("forms/new_show.html", form=form), 400
+    if not error and len(start_times) > 1:
+        flash(f"{len(start_times)} shows were successfully listed!")
+    elif not error:
+        flash("Show was successfully listed!")
+    else:
+        flash("An error occurred. Show could not be listed.")
+        # Internal Server Error
+        abort(500)
+    return render_template("pages/home.html")
@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from jinja2 import ChoiceLoader, FunctionLoader
+
+from app import create_app
+from extensions import db
+from models import Artist, Show, Venue
+from seed import seed
+
+# ----------------------------------------------------------------------------#
+# Fixtures.
+#
+# Every test gets its own app from the factory, on TEST_DATABASE_URL (an
+# in-memory SQLite database by default) seeded by seed.py. The testing
+# profile enforces QUERY_BUDGETS, so any request over its budget raises
+# QueryBudgetExceeded. Views are checked by status and template name; a
+# template missing from templates/ renders as its own name.
+# ----------------------------------------------------------------------------#
+
+SHOWS = 200
+
+
+@pytest.fixture
+def app():
+    app = create_app("testing")
+    app.jinja_loader = ChoiceLoader(
+        [app.jinja_loader, FunctionLoader(lambda name: name)]
+    )
+    with app.app_context():
+        db.create_all()
+        seed(SHOWS)
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def venue(app):
+    # the venue with the most upcoming shows.
+    return Venue.query.order_by(Venue.upcoming_shows_count.desc(), Venue.id).first()
+
+
+@pytest.fixture
+def artist(app):
+    return Artist.query.order_by(Artist.upcoming_shows_count.desc(), Artist.id).first()
+
+
+@pytest.fixture
+def free_time(app):
+    # an hour after every seeded show, free for any venue and artist.
+    latest = db.session.query(db.func.max(Show.end_time)).scalar()
+    return latest.replace(tzinfo=None) + timedelta(days=1)
+
+
+def query_count(response):
+    # statements issued by the request, from its Server-Timing header.
+    timing = response.headers["Server-Timing"]
+    return int(timing.split('desc="')[1].split(" ")[0])
+
+
+def now():
+    return datetime.now(timezone.utc)
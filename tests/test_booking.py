@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta
+
+import booking
+from extensions import db
+
+
+def test_overlap_across_a_month_boundary_is_refused(client, venue, artist):
+    # the second show starts in the next month's partition on Postgres,
+    # where the exclusion constraints don't compare it with the first.
+    year = db.session.query(db.func.max(booking.Show.start_time)).scalar().year + 1
+    first = {
+        "venue_id": venue.id,
+        "artist_id": artist.id,
+        "start_time": f"{year}-01-31T23:00:00",
+        "end_time": f"{year}-02-01T01:00:00",
+    }
+    assert client.post("/api/v1/shows", json=first).status_code == 201
+    second = {**first, "start_time": f"{year}-02-01T00:30:00", "end_time": None}
+    response = client.post("/api/v1/shows", json=second)
+    assert response.status_code == 409
+    assert response.json["conflicts"][0]["show_start_time"].startswith(
+        f"{year}-01-31T23:00:00"
+    )
+
+
+def test_find_conflicts_within_one_batch(app, venue, artist):
+    start = datetime(2100, 3, 31, 23)
+    shows = booking.bookings(venue.id, artist.id, [start], timedelta(hours=2))
+    shows += booking.bookings(
+        venue.id + 1, artist.id, [start + timedelta(hours=1)], timedelta(hours=1)
+    )
+    conflicts = booking.find_conflicts(shows)
+    assert [(show["start_time"], clash["id"]) for show, clash in conflicts] == [
+        (start + timedelta(hours=1), None)
+    ]
@@ -0,0 +1,82 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from conftest import query_count
+from extensions import db
+from instrumentation import QueryBudgetExceeded
+
+# ----------------------------------------------------------------------------#
+# Every route with a QUERY_BUDGETS entry stays within it. The testing profile
+# enforces the budgets, so a route over budget fails its request outright;
+# the counts are checked here too so a route that lost its budget entry
+# still shows up.
+# ----------------------------------------------------------------------------#
+
+
+def budget_requests(venue, artist):
+    # endpoint -> (method, path, form data)
+    return {
+        "venues.index": ("GET", "/venues", None),
+        "artists.index": ("GET", "/artists?genre=Jazz", None),
+        "shows.index": ("GET", "/shows", None),
+        "venues.show_venue": ("GET", f"/venues/{venue.id}", None),
+        "artists.show_artist": ("GET", f"/artists/{artist.id}", None),
+        "venues.search_venues": ("POST", "/venues/search", {"search_term": "the"}),
+        "artists.search_artists": ("POST", "/artists/search", {"search_term": "s"}),
+        "api.venues": ("GET", "/api/v1/venues?fields=id,name,genres", None),
+        "api.artists": ("GET", "/api/v1/artists", None),
+        "api.shows": ("GET", "/api/v1/shows", None),
+        "typeahead.lookup": ("GET", "/api/typeahead/venues?q=the", None),
+        "venues.venue_availability": (
+            "GET",
+            f"/venues/{venue.id}/availability",
+            None,
+        ),
+        "artists.artist_availability": (
+            "GET",
+            f"/artists/{artist.id}/availability",
+            None,
+        ),
+        "venues.venue_matches": ("GET", f"/venues/{venue.id}/matches", None),
+        "artists.artist_matches": ("GET", f"/artists/{artist.id}/matches", None),
+    }
+
+
+def test_every_budget_is_exercised(app, venue, artist):
+    assert set(budget_requests(venue, artist)) == set(app.config["QUERY_BUDGETS"])
+
+
+def test_routes_within_budget(app, client, venue, artist):
+    budgets = app.config["QUERY_BUDGETS"]
+    for endpoint, (method, path, data) in budget_requests(venue, artist).items():
+        # the first request also loads the in-memory indexes and fills the
+        # response cache; the second is served from them.
+        for _ in range(2):
+            response = client.open(path, method=method, data=data)
+            assert response.status_code == 200, endpoint
+            assert query_count(response) <= budgets[endpoint], endpoint
+
+
+def test_budget_is_enforced(app, client):
+    app.config["QUERY_BUDGETS"] = {**app.config["QUERY_BUDGETS"], "api.venues": 1}
+    with pytest.raises(QueryBudgetExceeded, match="api.venues issued 2 queries"):
+        client.get("/api/v1/venues?fields=id,name,genres")
+    # without genres the listing is one query.
+    assert client.get("/api/v1/venues?fields=id,name").status_code == 200
+
+
+def test_streamed_responses_are_not_counted(client):
+    # the export queries while its body is sent, after the request is counted.
+    response = client.get("/api/v1/export/shows.ndjson")
+    assert "Server-Timing" not in response.headers
+    assert response.get_data()
+
+
+def test_failed_statements_leave_no_timing_behind(app):
+    with db.engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM no_such_table"))
+        assert conn.info["query_started"] == []
+        conn.execute(text("SELECT 1"))
+        assert conn.info["query_started"] == []
@@ -0,0 +1,27 @@
+import pytest
+
+from app import create_app
+from config import DevelopmentConfig, TestingConfig, get_config
+
+
+def test_production_requires_database_url(monkeypatch):
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    with pytest.raises(RuntimeError, match="DATABASE_URL"):
+        create_app("production")
+
+
+def test_environment_is_read_when_the_profile_is_selected(monkeypatch):
+    # config.py is long imported by now.
+    monkeypatch.setenv("DATABASE_URL", "sqlite:////tmp/fyyur-production.db")
+    monkeypatch.setenv("CACHE_DEFAULT_TTL", "5")
+    # a production app would log to error.log; the profile is enough.
+    config = get_config("production")
+    assert config.SQLALCHEMY_DATABASE_URI == "sqlite:////tmp/fyyur-production.db"
+    assert config.CACHE_DEFAULT_TTL == 5
+    assert create_app(DevelopmentConfig).config["CACHE_DEFAULT_TTL"] == 5
+
+
+def test_database_url_argument_overrides_the_profile():
+    app = create_app(TestingConfig("sqlite:////tmp/fyyur-other.db"))
+    assert app.config["SQLALCHEMY_DATABASE_URI"] == "sqlite:////tmp/fyyur-other.db"
+    assert app.testing
@@ -0,0 +1,33 @@
+from models import Artist, Venue
+
+VENUES = """name,city,state,address,phone,genres,facebook_link
+Blue Room,Austin,TX,1 Main St,512-555-0101,"Jazz,Blues",https://www.facebook.com/blue
+Red Room,Austin,TX,2 Main St,(512) 555 0102,Jazz,https://www.facebook.com/red
+No Phone,Austin,TX,3 Main St,call us,Jazz,https://www.facebook.com/none
+"""
+
+
+def test_import_venues_with_formatted_phones(app, tmp_path):
+    path = tmp_path / "venues.csv"
+    path.write_text(VENUES)
+    result = app.test_cli_runner().invoke(args=["fyyur", "import", "venues", str(path)])
+    assert result.exit_code == 0, result.output
+    assert "2 venues imported, 1 rejected" in result.output
+    assert "line 4: phone: Not a phone number." in result.output
+    phones = {v.name: v.phone for v in Venue.query.filter(Venue.city == "Austin")}
+    assert phones["Blue Room"] == "512-555-0101"
+    assert phones["Red Room"] == "(512) 555 0102"
+    assert "No Phone" not in phones
+
+
+def test_import_artists(app, tmp_path):
+    path = tmp_path / "artists.csv"
+    path.write_text(
+        "name,city,state,phone,genres,facebook_link\n"
+        "Quiet Owls,Austin,TX,+1 512.555.0103,Folk,https://www.facebook.com/owls\n"
+    )
+    result = app.test_cli_runner().invoke(
+        args=["fyyur", "import", "artists", str(path)]
+    )
+    assert result.exit_code == 0, result.output
+    assert Artist.query.filter_by(name="Quiet Owls").one().phone == "+1 512.555.0103"
@@ -0,0 +1,21 @@
+import indexes
+from extensions import db
+
+
+def test_hot_queries_use_their_indexes(app):
+    # on Postgres (TEST_DATABASE_URL) seq scans are turned off for the plans.
+    try:
+        unused = {
+            f"{route} ({index})": plan
+            for route, index, plan, used in indexes.plans()
+            if not used
+        }
+    finally:
+        db.session.rollback()
+    assert not unused, "\n".join(f"{r}:\n{p}" for r, p in unused.items())
+
+
+def test_check_indexes_command(app):
+    result = app.test_cli_runner().invoke(args=["fyyur", "check-indexes"])
+    assert result.exit_code == 0, result.output
+    assert "FAIL" not in result.output
@@ -0,0 +1,259 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import partitions
+from app import create_app
+from extensions import db
+from models import Artist, Show, Venue, as_utc
+from partitions import show_archive
+
+# ----------------------------------------------------------------------------#
+# Every route of the blueprints answers, with the page or document it should.
+# ----------------------------------------------------------------------------#
+
+
+@pytest.mark.parametrize(
+    "path, template",
+    [
+        ("/", "pages/home.html"),
+        ("/venues", "pages/venues.html"),
+        ("/venues?genre=Jazz", "pages/venues.html"),
+        ("/venues/create", "forms/new_venue.html"),
+        ("/artists", "pages/artists.html"),
+        ("/artists?genre=Jazz&letter=s", "pages/artists.html"),
+        ("/artists/create", "forms/new_artist.html"),
+        ("/shows", "pages/shows.html"),
+        ("/shows?past=1", "pages/shows.html"),
+        ("/shows/create", "forms/new_show.html"),
+    ],
+)
+def test_pages(client, path, template):
+    response = client.get(path)
+    assert response.status_code == 200
+    assert response.get_data(as_text=True) == template
+
+
+@pytest.mark.parametrize("kind", ["venue", "artist"])
+def test_detail_pages(client, request, kind):
+    entity = request.getfixturevalue(kind)
+    for query in ("", "?past=1"):
+        response = client.get(f"/{kind}s/{entity.id}{query}")
+        assert response.status_code == 200
+        assert response.get_data(as_text=True) == f"pages/show_{kind}.html"
+        assert response.last_modified is not None
+    response = client.get(f"/{kind}s/{entity.id}/edit")
+    assert response.get_data(as_text=True) == f"forms/edit_{kind}.html"
+    assert client.get(f"/{kind}s/999999").status_code == 404
+
+
+def test_detail_page_not_modified(client, venue):
+    first = client.get(f"/venues/{venue.id}")
+    again = client.get(
+        f"/venues/{venue.id}",
+        headers={"If-Modified-Since": first.headers["Last-Modified"]},
+    )
+    assert again.status_code == 304
+
+
+@pytest.mark.parametrize("kind", ["venue", "artist"])
+def test_search(client, kind):
+    response = client.post(f"/{kind}s/search", data={"search_term": "the"})
+    assert response.status_code == 200
+    assert response.get_data(as_text=True) == f"pages/search_{kind}s.html"
+
+
+def test_listing_cursor(client):
+    assert client.get("/shows?cursor=not-a-cursor").status_code == 400
+    assert client.get("/artists?cursor=not-a-cursor").status_code == 400
+
+
+def test_healthz(client):
+    response = client.get("/healthz")
+    assert response.status_code == 200
+    assert response.json["database"] == "ok"
+
+
+@pytest.mark.parametrize("kind", ["venue", "artist"])
+def test_availability(client, request, kind):
+    entity = request.getfixturevalue(kind)
+    response = client.get(f"/{kind}s/{entity.id}/availability")
+    assert response.status_code == 200
+    assert response.json[f"{kind}_id"] == entity.id
+    assert response.json["busy"] or response.json["free"]
+
+    response = client.get(
+        f"/{kind}s/{entity.id}/availability"
+        "?from=2030-01-01T12:00:00%2B02:00&to=2030-01-02T00:00:00"
+    )
+    assert response.json["from"] == "2030-01-01T10:00:00+00:00"
+    assert client.get(f"/{kind}s/{entity.id}/availability?from=soon").status_code == 400
+    assert client.get(f"/{kind}s/999999/availability").status_code == 404
+
+
+@pytest.mark.parametrize("kind, other", [("venue", "artist"), ("artist", "venue")])
+def test_matches(client, request, kind, other):
+    entity = request.getfixturevalue(kind)
+    response = client.get(f"/{kind}s/{entity.id}/matches")
+    assert response.status_code == 200
+    assert response.json[f"{kind}_id"] == entity.id
+    assert client.get(f"/{kind}s/999999/matches").status_code == 404
+
+
+@pytest.mark.parametrize("kind", ["venues", "artists"])
+def test_typeahead(client, kind):
+    response = client.get(f"/api/typeahead/{kind}?q=s")
+    assert response.status_code == 200
+    assert all("s" in item["name"].lower() for item in response.json["data"])
+    assert client.get("/api/typeahead/shows?q=s").status_code == 404
+
+
+def test_api_listings(client):
+    response = client.get("/api/v1/venues?fields=id,name,genres&limit=5")
+    assert response.status_code == 200
+    assert set(response.json["data"][0]) == {"id", "name", "genres"}
+    assert response.json["next_cursor"]
+
+    seen = []
+    cursor = ""
+    while cursor is not None:
+        page = client.get(f"/api/v1/shows?limit=50&cursor={cursor}").json
+        seen += [show["id"] for show in page["data"]]
+        cursor = page["next_cursor"]
+    shows = partitions.show_source()
+    assert sorted(seen) == sorted(id for id, in db.session.query(shows.id))
+
+    assert client.get("/api/v1/artists").status_code == 200
+
+
+def test_export_shows(client):
+    response = client.get("/api/v1/export/shows.ndjson")
+    assert response.status_code == 200
+    lines = response.get_data(as_text=True).splitlines()
+    assert len(lines) == db.session.query(partitions.show_source().id).count()
+    assert set(json.loads(lines[0])) >= {"id", "start_time", "venue_id", "artist_id"}
+
+
+def test_create_venue_and_artist(client):
+    form = {
+        "name": "Test Hall",
+        "city": "San Francisco",
+        "state": "CA",
+        "address": "1 Main St",
+        "phone": "415-555-0100",
+        "genres": ["Jazz"],
+        "facebook_link": "https://www.facebook.com/test",
+        "seeking_talent": "y",
+    }
+    assert client.post("/venues/create", data=form).status_code == 302
+    venue = Venue.query.filter_by(name="Test Hall").one()
+    assert client.get("/api/typeahead/venues?q=test h").json["data"] == [
+        {"id": venue.id, "name": "Test Hall"}
+    ]
+
+    del form["address"], form["seeking_talent"]
+    form["name"] = "Test Band"
+    assert client.post("/artists/create", data=form).status_code == 200
+    assert client.get("/api/typeahead/artists?q=test b").json["data"]
+
+
+def test_create_show(client, venue, artist, free_time):
+    form = {
+        "venue_id": venue.id,
+        "artist_id": artist.id,
+        "start_time": free_time.strftime("%Y-%m-%d %H:%M:%S"),
+        "repeat": "weekly",
+        "count": "4",
+    }
+    assert client.post("/shows/create", data=form).status_code == 200
+    assert client.post("/shows/create", data=form).status_code == 409
+    assert (
+        client.post("/shows/create", data={**form, "venue_id": "999999"}).status_code
+        == 400
+    )
+
+
+def test_api_create_show(client, venue, artist, free_time):
+    body = {
+        "venue_id": venue.id,
+        "artist_id": artist.id,
+        "start_time": (free_time + timedelta(weeks=10)).isoformat() + "+02:00",
+        "repeat": {"frequency": "monthly", "count": 3},
+    }
+    response = client.post("/api/v1/shows", json=body)
+    assert response.status_code == 201
+    assert response.json["created"] == 3
+    expected = (free_time + timedelta(weeks=10, hours=-2)).isoformat()
+    assert response.json["shows"][0]["start_time"].startswith(expected)
+
+    assert client.post("/api/v1/shows", json=body).status_code == 409
+    assert (
+        client.post("/api/v1/shows", json={**body, "venue_id": 999999}).status_code
+        == 400
+    )
+    until = {"frequency": "weekly", "until": free_time.date().isoformat()}
+    response = client.post(
+        "/api/v1/shows",
+        json={
+            **body,
+            "start_time": (free_time + timedelta(days=30)).isoformat(),
+            "repeat": until,
+        },
+    )
+    assert response.status_code == 400
+
+
+def test_delete(client, venue, artist):
+    venue_id, artist_id = venue.id, artist.id
+    assert client.delete(f"/venues/{venue_id}").json == {"success": True}
+    assert client.delete(f"/venues/{venue_id}").json == {"success": False}
+    assert client.get(f"/venues/{venue_id}").status_code == 404
+
+    response = client.delete("/api/v1/artists", json={"ids": [artist_id, 999999]})
+    assert response.json == {"deleted": [artist_id], "not_found": [999999]}
+    assert client.get(f"/artists/{artist_id}").status_code == 404
+    assert client.delete("/api/v1/artists", json={"ids": "all"}).status_code == 400
+
+
+def test_bulk_delete_unversioned_paths(client, venue, artist):
+    venue_id, artist_id = venue.id, artist.id
+    response = client.delete("/api/venues", json={"ids": [venue_id]})
+    assert response.json == {"deleted": [venue_id], "not_found": []}
+    response = client.delete("/api/artists", json={"ids": [artist_id]})
+    assert response.json == {"deleted": [artist_id], "not_found": []}
+    assert client.get(f"/artists/{artist_id}").status_code == 404
+
+
+def test_apps_keep_their_own_caches_and_indexes(app, client):
+    # an empty database next to the seeded one; the scoped session belongs to
+    # whichever app opened it, so it is dropped when switching apps.
+    other = create_app("testing")
+    db.session.remove()
+    with other.app_context():
+        db.create_all()
+        assert other.test_client().get("/api/typeahead/venues?q=the").json == {
+            "data": []
+        }
+        db.session.remove()
+    assert other.extensions["response_cache"] is not app.extensions["response_cache"]
+    assert client.get("/api/typeahead/venues?q=the").json["data"]
+
+
+def test_last_modified_counts_archived_shows(client, venue):
+    # seed.py archives the shows that have started; with every updated_at in
+    # the past, the latest of them is the page's last modification.
+    long_ago = datetime(2000, 1, 1, tzinfo=timezone.utc)
+    for table in (Venue.__table__, Artist.__table__, Show.__table__, show_archive):
+        db.session.execute(table.update().values(updated_at=long_ago))
+    db.session.commit()
+    shows = partitions.show_source()
+    latest = (
+        db.session.query(db.func.max(shows.start_time))
+        .filter(
+            shows.venue_id == venue.id, shows.start_time <= datetime.now(timezone.utc)
+        )
+        .scalar()
+    )
+    response = client.get(f"/venues/{venue.id}")
+    assert response.last_modified == as_utc(latest).replace(microsecond=0)
@@ -0,0 +1,32 @@
+import search
+from extensions import db
+from models import Artist
+
+
+def names(term):
+    total, rows = search.search_artists(term, 50)
+    return {row.name for row in rows}
+
+
+def test_sqlite_search_matches_word_prefixes(app):
+    db.session.add_all(
+        [Artist(name="Band of Horses"), Artist(name="Bandits"), Artist(name="Sunband")]
+    )
+    db.session.commit()
+    found = names("band")
+    assert {"Band of Horses", "Bandits"} <= found
+    # FTS5 matches word prefixes, not substrings (Postgres would find it).
+    assert "Sunband" not in found
+
+
+def test_search_index_follows_renames_and_deletes(app):
+    artist = Artist(name="Quiet Owls")
+    db.session.add(artist)
+    db.session.commit()
+    artist.name = "Loud Owls"
+    db.session.commit()
+    assert "Loud Owls" in names("loud")
+    assert "Quiet Owls" not in names("quiet")
+    db.session.delete(artist)
+    db.session.commit()
+    assert "Loud Owls" not in names("loud")
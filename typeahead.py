@@ -0,0 +1,187 @@
+import threading
+import time
+from bisect import bisect_left, insort
+
+from flask import Blueprint, abort, current_app, jsonify, request
+
+from pagination import page_size
+
+
+def normalize(name):
+    return " ".join((name or "").casefold().split())
+
+
+# ----------------------------------------------------------------------------#
+# Prefix index.
+#
+# A sorted array of (key, id, name) where the keys are the normalized name and
+# each of its word suffixes, so "hop" finds "The Musical Hop". A lookup is one
+# bisect plus a scan over the matching run; edits are an insort per key.
+# ----------------------------------------------------------------------------#
+
+
+class PrefixIndex:
+    def __init__(self, items=()):
+        self._names = {}
+        self._entries = []
+        for id, name in items:
+            self._names[id] = name
+            self._entries.extend(self._keys(id, name))
+        self._entries.sort()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _keys(id, name):
+        words = normalize(name).split(" ")
+        return [(" ".join(words[i:]), id, name) for i in range(len(words))]
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, id):
+        return id in self._names
+
+    def add(self, id, name):
+        with self._lock:
+            self._discard(id)
+            self._names[id] = name
+            for entry in self._keys(id, name):
+                insort(self._entries, entry)
+
+    def remove(self, id):
+        with self._lock:
+            self._discard(id)
+
+    def _discard(self, id):
+        name = self._names.pop(id, None)
+        if name is None:
+            return
+        for entry in self._keys(id, name):
+            i = bisect_left(self._entries, entry)
+            if i < len(self._entries) and self._entries[i] == entry:
+                del self._entries[i]
+
+    def search(self, prefix, limit=10):
+        # [(id, name)] in key order; a name matching on several words is
+        # returned once.
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        found = {}
+        with self._lock:
+            i = bisect_left(self._entries, (prefix,))
+            while i < len(self._entries) and len(found) < limit:
+                key, id, name = self._entries[i]
+                if not key.startswith(prefix):
+                    break
+                found.setdefault(id, name)
+                i += 1
+        return list(found.items())
+
+
+# ----------------------------------------------------------------------------#
+# Name indexes.
+#
+# One PrefixIndex per kind ("venues", "artists"), loaded from the database on
+# first use and kept current by the write handlers. Writes made by other
+# processes (workers, `flask fyyur import`) are picked up by a full reload
+# every TYPEAHEAD_REFRESH_SECONDS. Every app has its own indexes, loaded
+# from its own database.
+# ----------------------------------------------------------------------------#
+
+
+class NameIndexes:
+    # one app's indexes.
+    def __init__(self, loaders, refresh=None):
+        self.loaders = loaders
+        self.refresh = refresh
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def index(self, kind):
+        loaded = self._indexes.get(kind)
+        if loaded is None or (
+            self.refresh and time.monotonic() - loaded[1] > self.refresh
+        ):
+            with self._lock:
+                loaded = (PrefixIndex(self.loaders[kind]()), time.monotonic())
+                self._indexes[kind] = loaded
+        return loaded[0]
+
+    def add(self, kind, id, name):
+        if kind in self._indexes:
+            self._indexes[kind][0].add(id, name)
+
+    def remove(self, kind, id):
+        if kind in self._indexes:
+            self._indexes[kind][0].remove(id)
+
+    def invalidate(self, *kinds):
+        for kind in kinds or list(self._indexes):
+            self._indexes.pop(kind, None)
+
+    def __contains__(self, kind):
+        return kind in self.loaders
+
+
+class NameIndex:
+    # the extension: loaders are registered once, the indexes of the current
+    # app are used.
+    def __init__(self, app=None):
+        self.loaders = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions["typeahead"] = NameIndexes(
+            self.loaders, app.config.get("TYPEAHEAD_REFRESH_SECONDS", 300)
+        )
+
+    def source(self, kind, loader):
+        # loader() returns (id, name) rows for every entity of this kind.
+        self.loaders[kind] = loader
+
+    @property
+    def indexes(self):
+        return current_app.extensions["typeahead"]
+
+    def index(self, kind):
+        return self.indexes.index(kind)
+
+    def add(self, kind, id, name):
+        self.indexes.add(kind, id, name)
+
+    def remove(self, kind, id):
+        self.indexes.remove(kind, id)
+
+    def invalidate(self, *kinds):
+        self.indexes.invalidate(*kinds)
+
+    def __contains__(self, kind):
+        return kind in self.loaders
+
+
+# ----------------------------------------------------------------------------#
+# Endpoints.
+# ----------------------------------------------------------------------------#
+
+typeahead = Blueprint("typeahead", __name__, url_prefix="/api/typeahead")
+
+
+@typeahead.route("/<kind>")
+def lookup(kind):
+    names = current_app.extensions["typeahead"]
+    if kind not in names:
+        abort(404, description=f"unknown kind: {kind}")
+    limit = page_size(
+        request.args.get("limit", type=int),
+        current_app.config["TYPEAHEAD_LIMIT"],
+        current_app.config["MAX_TYPEAHEAD_LIMIT"],
+    )
+    matches = names.index(kind).search(request.args.get("q", ""), limit)
+    return jsonify({"data": [{"id": id, "name": name} for id, name in matches]})
+
+
+@typeahead.errorhandler(404)
+def typeahead_error(error):
+    return jsonify({"error": error.description}), error.code
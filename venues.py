@@ -0,0 +1,333 @@
+import sys
+from itertools import groupby
+
+from flask import (
+    Blueprint,
+    abort,
+    current_app,
+    flash,
+    jsonify,
+    redirect,
+    render_template,
+    request,
+    url_for,
+)
+
+import partitions
+import search
+from conditional import conditional
+from deletion import delete_entities
+from extensions import cache, db, names
+from forms import VenueForm
+from models import Artist, Genre, Venue, utcnow, venue_genres
+from pagination import keyset_page
+from routing import replica_ok
+from views import (
+    availability,
+    detail_validator,
+    extract_data,
+    forget_deleted,
+    listing_limit,
+    load_detail,
+    match_list,
+    remember_profile,
+)
+
+venues = Blueprint("venues", __name__, url_prefix="/venues")
+
+VENUE_FIELDS = (
+    "id",
+    "name",
+    "address",
+    "city",
+    "state",
+    "phone",
+    "website",
+    "facebook_link",
+    "seeking_talent",
+    "seeking_description",
+    "image_link",
+)
+
+
+# hot query, checked against its index by indexes.py.
+def venue_areas_query(genre=None):
+    # venues ordered by area, each with its (denormalized) upcoming show count.
+    query = db.session.query(
+        Venue.id,
+        Venue.name,
+        Venue.city,
+        Venue.state,
+        Venue.upcoming_shows_count.label("num_upcoming_shows"),
+    )
+    if genre:
+        query = (
+            query.join(venue_genres, venue_genres.c.venue_id == Venue.id)
+            .join(Genre, Genre.id == venue_genres.c.genre_id)
+            .filter(Genre.name == genre)
+        )
+    return query.order_by(Venue.city, Venue.state, Venue.name, Venue.id)
+
+
+# (city, state, name, id) is the /venues keyset, matching ix_Venue_city_state_name_id.
+VENUE_AREA_KEYSET = (Venue.city, Venue.state, Venue.name, Venue.id)
+
+
+def venue_validator(venue_id):
+    return detail_validator(Venue, venue_id, "venue_id", "artist_id", Artist)
+
+
+# cache invalidation: a venue's name and image also appear on the pages of
+# its shows' artists and on /shows.
+def invalidate_venue(venue_id):
+    shows = partitions.show_source()
+    artist_ids = (
+        db.session.query(shows.artist_id).filter(shows.venue_id == venue_id).distinct()
+    )
+    cache.invalidate(
+        "venues",
+        "shows",
+        f"venue:{venue_id}",
+        *(f"artist:{artist_id}" for artist_id, in artist_ids),
+    )
+
+
+#  Venues
+#  ----------------------------------------------------------------
+
+
+@venues.route("")
+@cache.cached("venues")
+def index():
+    genre = request.args.get("genre")
+
+    # one query per page; show counts come from the counter columns.
+    try:
+        rows, next_cursor = keyset_page(
+            venue_areas_query(genre),
+            VENUE_AREA_KEYSET,
+            request.args.get("cursor"),
+            (str, str, str, int),
+            listing_limit(),
+        )
+    except ValueError:
+        abort(400)
+
+    # rows arrive sorted by city and state, so consecutive rows form an area
+    # (an area cut by a page boundary continues on the next page).
+    data = []
+    for (city, state), area in groupby(rows, key=lambda v: (v.city, v.state)):
+        data.append(
+            {
+                "city": city,
+                "state": state,
+                "venues": [
+                    {
+                        "id": v.id,
+                        "name": v.name,
+                        "num_upcoming_shows": v.num_upcoming_shows,
+                    }
+                    for v in area
+                ],
+            }
+        )
+
+    return render_template(
+        "pages/venues.html",
+        areas=data,
+        genre=genre,
+        next_cursor=next_cursor,
+        next_url=next_cursor
+        and url_for(
+            "venues.index",
+            cursor=next_cursor,
+            genre=genre,
+            limit=request.args.get("limit"),
+        ),
+    )
+
+
+@venues.route("/search", methods=["POST"])
+@replica_ok
+def search_venues():
+    search_term = extract_data("search_term")
+    page = max(request.form.get("page", 1, type=int), 1)
+    limit = current_app.config["SEARCH_PAGE_SIZE"]
+    total, venue_result = search.search_venues(
+        search_term, limit, offset=(page - 1) * limit
+    )
+
+    response = {
+        "count": total,
+        "data": [
+            {
+                "id": result.id,
+                "name": result.name,
+                "num_upcoming_shows": result.num_upcoming_shows,
+            }
+            for result in venue_result
+        ],
+    }
+
+    return render_template(
+        "pages/search_venues.html",
+        results=response,
+        search_term=request.form.get("search_term"),
+        page=page,
+        has_next=page * limit < total,
+    )
+
+
+@venues.route("/<int:venue_id>")
+@conditional(venue_validator)
+@cache.cached("venue:{venue_id}")
+def show_venue(venue_id):
+    venue = Venue.query.get_or_404(venue_id)
+    past = request.args.get("past", type=int) == 1
+    data = load_detail(
+        venue, VENUE_FIELDS, "venue_id", "artist_id", Artist, "artist", past
+    )
+    return render_template(
+        "pages/show_venue.html",
+        venue=data,
+        past=past,
+        past_url=url_for("venues.show_venue", venue_id=venue_id, past=1),
+    )
+
+
+@venues.route("/<int:venue_id>/availability")
+def venue_availability(venue_id):
+    return availability("venue", Venue, venue_id)
+
+
+@venues.route("/<int:venue_id>/matches")
+def venue_matches(venue_id):
+    return match_list("venue", Venue, venue_id)
+
+
+#  Create Venue
+#  ----------------------------------------------------------------
+
+
+@venues.route("/create", methods=["GET"])
+def create_venue_form():
+    form = VenueForm()
+    return render_template("forms/new_venue.html", form=form)
+
+
+@venues.route("/create", methods=["POST"])
+def create_venue_submission():
+    try:
+        data = Venue()
+        data.name = request.form.get("name")
+        data.genres = Genre.resolve(request.form.getlist("genres"))
+        data.address = request.form.get("address")
+        data.city = request.form.get("city")
+        data.state = request.form.get("state")
+        data.phone = request.form.get("phone")
+        data.facebook_link = request.form.get("facebook_link")
+        data.image_link = request.form.get("image_link")
+        data.website = request.form.get("website_link")
+        data.seeking_talent = (
+            True if request.form.get("seeking_talent") != None else False
+        )
+        data.seeking_description = request.form.get("seeking_description")
+
+        db.session.add(data)
+        db.session.commit()
+        cache.invalidate("venues")
+        names.add("venues", data.id, data.name)
+        remember_profile("venues", data.id, "seeking_talent")
+    except:
+        flash(
+            "An error occurred. Venue "
+            + request.form.get("name")
+            + " could not be listed.",
+            category="error",
+        )
+        print("exc_info()", sys.exc_info())
+        db.session.rollback()
+
+    finally:
+        db.session.close()
+        return redirect(url_for("venues.index"))
+
+
+@venues.route("/<int:venue_id>", methods=["DELETE"])
+def delete_venue(venue_id):
+    status = False
+    try:
+        deleted, artist_ids = delete_entities(Venue, [venue_id])
+        if not deleted:
+            raise LookupError(f"no venue {venue_id}")
+        db.session.commit()
+        forget_deleted(Venue, deleted, artist_ids)
+        status = True
+        flash("Venue successfully deleted!")
+
+    except:
+        print(sys.exc_info())
+        db.session.rollback()
+        status = False
+        flash("Error deleting venue", category="error")
+
+    finally:
+        db.session.close()
+
+    return jsonify({"success": status})
+
+
+#  Update
+#  ----------------------------------------------------------------
+
+
+@venues.route("/<int:venue_id>/edit", methods=["GET"])
+def edit_venue(venue_id):
+    form = VenueForm()
+    data = Venue.query.get(venue_id)
+    edit_venue_data = {
+        "id": data.id,
+        "name": data.name,
+        "genres": [genre.name for genre in data.genres],
+        "address": data.address,
+        "city": data.city,
+        "state": data.state,
+        "phone": data.phone,
+        "website": data.website,
+        "facebook_link": data.facebook_link,
+        "seeking_talent": data.seeking_talent,
+        "seeking_description": data.seeking_description,
+        "image_link": data.image_link,
+    }
+    return render_template("forms/edit_venue.html", form=form, venue=edit_venue_data)
+
+
+@venues.route("/<int:venue_id>/edit", methods=["POST"])
+def edit_venue_submission(venue_id):
+    try:
+        data = Venue.query.get(venue_id)
+        data.name = request.form.get("name")
+        data.genres = Genre.resolve(request.form.getlist("genres"))
+        data.address = request.form.get("address")
+        data.city = request.form.get("city")
+        data.state = request.form.get("state")
+        data.phone = request.form.get("phone")
+        data.facebook_link = request.form.get("facebook_link")
+        data.image_link = request.form.get("image_link")
+        data.website = request.form.get("website_link")
+        data.seeking_talent = (
+            True if request.form.get("seeking_talent") != None else False
+        )
+        data.seeking_description = request.form.get("seeking_description")
+        # genre changes don't touch the row itself, so bump it explicitly.
+        data.updated_at = utcnow()
+        db.session.add(data)
+        db.session.commit()
+        invalidate_venue(venue_id)
+        names.add("venues", venue_id, request.form.get("name"))
+        remember_profile("venues", venue_id, "seeking_talent")
+    except:
+        db.session.rollback()
+    finally:
+        db.session.close()
+    return redirect(url_for("venues.show_venue", venue_id=venue_id))
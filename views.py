@@ -0,0 +1,367 @@
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+import babel
+import babel.dates
+import dateutil.parser
+from flask import Blueprint, current_app, jsonify, render_template, request
+from sqlalchemy import and_, func, select, text
+from sqlalchemy.pool import QueuePool
+
+import booking
+import partitions
+from extensions import cache, db, matches, names
+from matching import shared_genres
+from models import Genre, Venue, as_utc
+from pagination import page_size
+
+# ----------------------------------------------------------------------------#
+# Helpers shared by the venue, artist and show blueprints (and api.py).
+# ----------------------------------------------------------------------------#
+
+
+DATETIME_FORMATS = {
+    "full": "EEEE MMMM, d, y 'at' h:mma",
+    "medium": "EE MM, dd, y h:mma",
+}
+
+
+# compiled babel pattern and locale, resolved once per (format, locale).
+@lru_cache(maxsize=None)
+def datetime_pattern(format, locale):
+    pattern = babel.dates.parse_pattern(DATETIME_FORMATS.get(format, format))
+    return pattern, babel.Locale.parse(locale)
+
+
+# listings repeat the same timestamps, so formatted values are memoized too.
+@lru_cache(maxsize=4096)
+def formatted_datetime(value, format, locale):
+    pattern, locale = datetime_pattern(format, locale)
+    return pattern.apply(value, locale)
+
+
+def format_datetime(value, format="medium", locale="en"):
+    # views pass datetimes; strings are still accepted for older callers.
+    if isinstance(value, str):
+        value = dateutil.parser.parse(value)
+    return formatted_datetime(value, format, locale)
+
+
+# form submission getter
+def extract_data(field_name):
+    if field_name == "genres":
+        return request.form.getlist(field_name)
+    elif (
+        field_name == "seeking_talent"
+        or field_name == "seeking_venue"
+        and request.form[field_name] == "y"
+    ):
+        return True
+    elif (
+        field_name == "seeking_talent"
+        or field_name == "seeking_venue"
+        and request.form[field_name] != "y"
+    ):
+        return False
+    else:
+        return request.form[field_name]
+
+
+def listing_limit():
+    return page_size(
+        request.args.get("limit", type=int),
+        current_app.config["LISTING_PAGE_SIZE"],
+        current_app.config["MAX_PAGE_SIZE"],
+    )
+
+
+# detail pages
+def detail_shows_query(fk, entity_id, counterpart_fk, counterpart, past=False):
+    # shows of one venue/artist (fk "venue_id"/"artist_id") with the
+    # counterpart's name and image; only upcoming ones unless past is set.
+    source = partitions.show_source(past)
+    query = (
+        db.session.query(
+            source.start_time, counterpart.id, counterpart.name, counterpart.image_link
+        )
+        .join(counterpart, counterpart.id == getattr(source, counterpart_fk))
+        .filter(getattr(source, fk) == entity_id)
+        .order_by(source.start_time)
+    )
+    if not past:
+        query = query.filter(partitions.upcoming(source))
+    return query
+
+
+def load_detail(entity, fields, fk, counterpart_fk, counterpart, prefix, past=False):
+    # entity fields plus its shows, fetched in one query joined with the
+    # counterpart (a venue's artists or an artist's venues) and split into
+    # past/upcoming in a single pass. Past shows are only listed when asked
+    # for, so the default page reads just the upcoming partitions.
+    data = {field: getattr(entity, field) for field in fields}
+    data["genres"] = [genre.name for genre in entity.genres]
+    data.update(
+        {
+            "past_shows": [],
+            "upcoming_shows": [],
+            "past_shows_count": 0,
+            "upcoming_shows_count": 0,
+        }
+    )
+    rows = detail_shows_query(fk, entity.id, counterpart_fk, counterpart, past).all()
+    current_time = datetime.now(timezone.utc)
+    for start_time, other_id, other_name, other_image_link in rows:
+        key = "upcoming_shows" if as_utc(start_time) > current_time else "past_shows"
+        data[key].append(
+            {
+                f"{prefix}_id": other_id,
+                f"{prefix}_name": other_name,
+                f"{prefix}_image_link": other_image_link,
+                "start_time": start_time,
+            }
+        )
+        data[f"{key}_count"] += 1
+    if not past:
+        # the counters' total is exact; the split between them may lag until
+        # the next rollover.
+        data["past_shows_count"] = max(
+            entity.upcoming_shows_count
+            + entity.past_shows_count
+            - data["upcoming_shows_count"],
+            0,
+        )
+    return data
+
+
+def detail_validator(model, entity_id, fk, counterpart_fk, counterpart):
+    # conditional GET validator for a detail page, in one query: the entity's
+    # updated_at plus the newest updated_at and the number of the shows it
+    # lists, and of their counterparts (whose names and images it shows).
+    # A show starting moves from upcoming to past without touching any
+    # updated_at, so the start of the latest show that has begun counts as
+    # a modification too.
+    past = request.args.get("past", type=int) == 1
+    source = partitions.show_source(past)
+    now = datetime.now(timezone.utc)
+    listed = getattr(source, fk) == model.id
+    if not past:
+        listed = and_(listed, partitions.upcoming(source, now))
+    # archived shows included, or the latest start would go back once
+    # rotate-shows moves it; never correlated with the listed shows.
+    shows = partitions.show_source(past=True)
+    started = (
+        select(func.max(shows.start_time))
+        .where(getattr(shows, fk) == entity_id, shows.start_time <= now)
+        .correlate(None)
+        .scalar_subquery()
+    )
+    row = (
+        db.session.query(
+            model.updated_at,
+            func.max(source.updated_at),
+            func.max(counterpart.updated_at),
+            started,
+            func.count(source.id),
+        )
+        .outerjoin(source, listed)
+        .outerjoin(counterpart, counterpart.id == getattr(source, counterpart_fk))
+        .filter(model.id == entity_id)
+        .group_by(model.id)
+        .first()
+    )
+    if row is None:
+        return None
+    last_modified = max(as_utc(value) for value in row[:4] if value is not None)
+    return (last_modified, *row)
+
+
+# cache and index upkeep after writes
+def forget_deleted(model, ids, counterpart_ids):
+    # after deleting venues or artists: their pages, the listings, and the
+    # pages of counterparts that lost shows are stale.
+    kind, counterpart = ("venue", "artist") if model is Venue else ("artist", "venue")
+    cache.invalidate(
+        "venues",
+        "artists",
+        "shows",
+        *(f"{kind}:{i}" for i in ids),
+        *(f"{counterpart}:{i}" for i in counterpart_ids),
+    )
+    for i in ids:
+        names.remove(f"{kind}s", i)
+        matches.remove(f"{kind}s", i)
+
+
+def remember_profile(kind, entity_id, seeking_field):
+    # after a create or edit: the submitted form is the entity's new profile.
+    matches.add(
+        kind,
+        entity_id,
+        request.form.get("name"),
+        request.form.get("city"),
+        request.form.get("state"),
+        request.form.get(seeking_field) is not None,
+        Genre.clean(request.form.getlist("genres")),
+    )
+
+
+def forget_booked(venue_id, artist_id):
+    # new shows change /shows, the upcoming counts on /venues, and both pages.
+    cache.invalidate("shows", "venues", f"venue:{venue_id}", f"artist:{artist_id}")
+
+
+def known_id(kind, model, entity_id):
+    # for reads: the typeahead index answers without a query; a miss is
+    # confirmed against the database since another process may have created
+    # it. The index may still hold a record deleted by another process, so
+    # writes use record_exists().
+    return entity_id is not None and (
+        entity_id in names.index(kind) or record_exists(model, entity_id)
+    )
+
+
+def record_exists(model, entity_id):
+    # one primary key lookup.
+    return (
+        entity_id is not None
+        and db.session.query(model.id).filter(model.id == entity_id).first() is not None
+    )
+
+
+def match_profiles(model, link, fk, seeking):
+    # (id, name, city, state, seeking, [genre names]) for every row, in two
+    # queries; the loader of a MatchIndex source.
+    genres = {}
+    for entity_id, genre in db.session.query(link.c[fk], Genre.name).join(
+        Genre, Genre.id == link.c.genre_id
+    ):
+        genres.setdefault(entity_id, []).append(genre)
+    rows = db.session.query(
+        model.id, model.name, model.city, model.state, getattr(model, seeking)
+    )
+    return [(*row, genres.get(row[0], [])) for row in rows]
+
+
+# JSON views of a venue or artist
+def availability(kind, model, entity_id):
+    # busy and free time of a venue or artist between ?from= and ?to= (ISO
+    # 8601; now and AVAILABILITY_DEFAULT_DAYS later by default) as JSON.
+    if not known_id(f"{kind}s", model, entity_id):
+        return jsonify({"error": f"no {kind} {entity_id}"}), 404
+    try:
+        start, end = (
+            request.args.get(name) and datetime.fromisoformat(request.args[name])
+            for name in ("from", "to")
+        )
+    except ValueError:
+        return jsonify({"error": "from and to must be ISO 8601 times"}), 400
+    start = as_utc(start) if start else datetime.now(timezone.utc)
+    end = (
+        as_utc(end)
+        if end
+        else start + timedelta(days=current_app.config["AVAILABILITY_DEFAULT_DAYS"])
+    )
+    max_days = current_app.config["AVAILABILITY_MAX_DAYS"]
+    if not start < end <= start + timedelta(days=max_days):
+        return (
+            jsonify({"error": f"to must be after from, by {max_days} days at most"}),
+            400,
+        )
+
+    busy, free = booking.availability(f"{kind}_id", entity_id, start, end)
+    return jsonify(
+        {
+            f"{kind}_id": entity_id,
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "busy": [
+                {"show_id": i, "start_time": s.isoformat(), "end_time": e.isoformat()}
+                for s, e, i in busy
+            ],
+            "free": [
+                {"start_time": s.isoformat(), "end_time": e.isoformat()}
+                for s, e in free
+            ],
+        }
+    )
+
+
+def match_list(kind, model, entity_id):
+    # the counterparts best matching a venue or artist, as JSON; both sides
+    # have to be seeking (see matching.py).
+    limit = page_size(
+        request.args.get("limit", type=int),
+        current_app.config["MATCH_LIMIT"],
+        current_app.config["MAX_MATCH_LIMIT"],
+    )
+    found = matches.matches(f"{kind}s", entity_id, limit)
+    if found is None and known_id(f"{kind}s", model, entity_id):
+        # created by another process since the index was loaded.
+        matches.invalidate(f"{kind}s")
+        found = matches.matches(f"{kind}s", entity_id, limit)
+    if found is None:
+        return jsonify({"error": f"no {kind} {entity_id}"}), 404
+
+    profile, ranked = found
+    return jsonify(
+        {
+            f"{kind}_id": entity_id,
+            "seeking": profile["seeking"],
+            "data": [
+                {
+                    "id": id,
+                    "name": other["name"],
+                    "city": other["city"],
+                    "state": other["state"],
+                    "genres": shared_genres(profile, other),
+                    "score": score,
+                }
+                for id, score, other in ranked
+            ],
+        }
+    )
+
+
+# ----------------------------------------------------------------------------#
+# Home page, health check and error pages.
+# ----------------------------------------------------------------------------#
+
+main = Blueprint("main", __name__)
+
+
+@main.route("/")
+def index():
+    return render_template("pages/home.html")
+
+
+@main.route("/healthz")
+def healthz():
+    pool = db.engine.pool
+    stats = {"class": type(pool).__name__, "status": pool.status()}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            {
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                # QueuePool counts overflow from -size; report only the excess.
+                "overflow": max(pool.overflow(), 0),
+            }
+        )
+    try:
+        db.session.execute(text("SELECT 1"))
+        database, status = "ok", 200
+    except Exception:
+        current_app.logger.exception("health check query failed")
+        database, status = "unavailable", 503
+    return jsonify({"database": database, "pool": stats}), status
+
+
+@main.app_errorhandler(404)
+def not_found_error(error):
+    return render_template("errors/404.html"), 404
+
+
+@main.app_errorhandler(500)
+def server_error(error):
+    return render_template("errors/500.html"), 500